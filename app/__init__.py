@@ -23,6 +23,10 @@ def create_app(config_name=None):
     from config import config
     app.config.from_object(config[config_name])
     
+    # Faster JSON encoding for large list responses
+    from app.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
     # Load environment-specific config
     if os.path.exists('.env'):
         from dotenv import load_dotenv
@@ -38,12 +42,45 @@ def create_app(config_name=None):
     # Initialize API
     api.init_app(app)
     
+    # Document custom fields
+    from marshmallow import fields
+    from app.schemas.fields import Money
+    api.register_field(Money, fields.Float)
+    
+    # Unicode-aware lower() on SQLite, as on PostgreSQL
+    from app.sql import init_sqlite_functions
+    init_sqlite_functions(app)
+    
+    # Count SQL statements per request and enforce route query budgets
+    from app.query_budget import init_query_counter
+    init_query_counter(app)
+    
+    # Password hashing in a bounded process pool
+    from app.passwords import init_password_hasher
+    init_password_hasher(app)
+    
+    # Cached user lookups for JWT identities
+    from app.identity import init_identity_cache
+    init_identity_cache(app)
+    
+    # In-memory mirror of revoked JWTs
+    from app.revocation import init_revocation_list
+    init_revocation_list(app)
+    
+    # Versioned response cache for polled read endpoints
+    from app.cache import init_response_cache
+    init_response_cache(app)
+    
     # Register JWT error handlers
     register_jwt_handlers(app)
     
     # Register error handlers
     register_error_handlers(app)
     
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Register blueprints
     from app.routes.healthcheck import healthcheck_bp
     from app.routes.auth_routes import auth_bp
@@ -59,6 +96,11 @@ def create_app(config_name=None):
     api.register_blueprint(account_bp)
     api.register_blueprint(expense_bp)
     
+    # Global categories are loaded on first use, not here: startup must
+    # work against a database that `flask db upgrade` hasn't reached yet
+    from app.global_categories import init_global_categories
+    init_global_categories(app)
+
     # Create tables
     with app.app_context():
         db.create_all()
@@ -108,11 +150,15 @@ def register_jwt_handlers(app):
             "error": "token_revoked"
         }), 401
     
+    @jwt.token_in_blocklist_loader
+    def token_in_blocklist_callback(_jwt_header, jwt_payload):
+        from app.revocation import revocation_list
+        return revocation_list().is_revoked(jwt_payload["jti"])
+    
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
-        identity = jwt_data["sub"]
-        from app.models.user import User
-        return User.query.filter_by(id=identity).one_or_none()
+        from app.identity import load_identity
+        return load_identity(jwt_data["sub"])
 
 def register_error_handlers(app):
     """Register error handlers."""
@@ -156,6 +202,18 @@ def register_error_handlers(app):
             "message": "An unexpected error occurred"
         }), 500
     
+    from app.passwords import PasswordHasherBusy
+    
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        app.logger.warning(f'Shedding request: {error}')
+        response = jsonify({
+            "error": "Service Unavailable",
+            "message": "The server is busy, please retry shortly"
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
     @app.errorhandler(Exception)
     def handle_exception(error):
         app.logger.error(f'Unhandled Exception: {error}')
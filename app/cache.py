@@ -0,0 +1,200 @@
+"""Per-user versioned response cache for polled read endpoints.
+
+Every write route bumps the user's data version (User.bump_data_version)
+in the same transaction as the write. Read responses are keyed by
+(user, data version, URL): the key doubles as the ETag, so a matching
+If-None-Match is answered with 304 after a single primary-key lookup on
+users, and a repeat read without one is served from the body cache.
+Entries are never invalidated; a bump simply makes the old keys
+unreachable and they age out.
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+DEFAULT_TTL = 300
+DEFAULT_SIZE = 1024
+# Bodies larger than this are served but not cached
+DEFAULT_MAX_ENTRY_BYTES = 256 * 1024
+# Total length of the cached values of one in-process cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry expiry.
+
+    Bounded by entry count, and with `max_bytes` also by the total
+    length of the (str or bytes) values stored.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, ttl=DEFAULT_TTL, max_bytes=None):
+        self.size = size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _length(self, value):
+        return len(value) if self.max_bytes is not None else 0
+
+    def _evict(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= self._length(value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._evict(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        length = self._length(value)
+        if self.max_bytes is not None and length > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._bytes += length
+            while len(self._entries) > self.size or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+
+    def stats(self):
+        """Hit and miss counts since start, and the current entry count."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'bytes': self._bytes}
+
+
+class RedisCache:
+    """Cache shared by all workers, degrading to a LocalCache on errors."""
+
+    def __init__(self, url, size=DEFAULT_SIZE, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url)
+        self.fallback = LocalCache(size, ttl, max_bytes)
+
+    def get(self, key):
+        try:
+            return self.client.get(key)
+        except redis.RedisError:
+            return self.fallback.get(key)
+
+    def set(self, key, value):
+        try:
+            self.client.set(key, value, ex=self.ttl)
+        except redis.RedisError:
+            self.fallback.set(key, value)
+
+
+def init_response_cache(app):
+    """Create the response cache configured for `app`.
+
+    Uses the shared store at RESPONSE_CACHE_URL when it is set and the
+    redis client is installed, and an in-process cache otherwise. The
+    in-process cache holds at most RESPONSE_CACHE_MAX_BYTES of payloads.
+    """
+    url = app.config.get('RESPONSE_CACHE_URL')
+    size = app.config.get('RESPONSE_CACHE_SIZE', DEFAULT_SIZE)
+    ttl = app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL)
+    max_bytes = app.config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+    if url and redis is not None:
+        cache = RedisCache(url, size, ttl, max_bytes)
+    else:
+        if url:
+            app.logger.warning('redis is not installed, using an in-process response cache')
+        cache = LocalCache(size, ttl, max_bytes)
+
+    app.extensions['response_cache'] = cache
+    return cache
+
+
+def response_key(user_id, version):
+    """Opaque key (and ETag) of the current request for a user data version."""
+    message = f'{user_id}:{version}:{request.full_path}'.encode()
+    secret = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()[:32]
+
+
+def _cached_response(payload, etag):
+    entry = json.loads(payload)
+    response = current_app.response_class(entry['body'], status=entry['status'], headers=entry['headers'])
+    response.set_etag(etag)
+    return response
+
+
+def versioned_response(view):
+    """Serve a read endpoint through the per-user versioned cache.
+
+    Must be applied inside jwt_required() and outside the flask-smorest
+    decorators so that it sees the final Response. Bodies over
+    RESPONSE_CACHE_MAX_ENTRY_BYTES (such as unpaginated lists) still get
+    an ETag for 304s but are not stored.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from app.models.user import User
+
+        user_id = get_jwt_identity()
+        # Read the version before the data so a concurrent write can only
+        # make the cached body newer than its key, never older
+        version = User.data_version_of(user_id)
+        etag = response_key(user_id, version)
+
+        if etag in request.if_none_match and not request.if_none_match.star_tag:
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+        else:
+            cache = current_app.extensions['response_cache']
+            payload = cache.get('response:' + etag)
+            if payload is not None:
+                response = _cached_response(payload, etag)
+            else:
+                response = view(*args, **kwargs)
+                max_entry_bytes = current_app.config.get('RESPONSE_CACHE_MAX_ENTRY_BYTES', DEFAULT_MAX_ENTRY_BYTES)
+                if response.status_code == 200 and len(response.get_data()) <= max_entry_bytes:
+                    cache.set('response:' + etag, json.dumps({
+                        'body': response.get_data(as_text=True),
+                        'status': response.status_code,
+                        'headers': [
+                            (name, value) for name, value in response.headers
+                            if name not in ('Content-Length', 'ETag')
+                        ]
+                    }))
+                if response.status_code == 200:
+                    response.set_etag(etag)
+
+        # Responses differ per token and must be revalidated on every poll
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        return response
+
+    return wrapper
@@ -0,0 +1,206 @@
+"""Flask CLI commands for maintaining derived data."""
+import click
+from flask.cli import AppGroup
+from sqlalchemy import BigInteger, Integer, inspect, text
+
+rollups_cli = AppGroup('rollups', help='Maintain the expense_rollups table.')
+money_cli = AppGroup('money', help='Maintain money columns.')
+ledger_cli = AppGroup('ledger', help='Maintain the account balance ledger.')
+idempotency_cli = AppGroup('idempotency', help='Maintain stored Idempotency-Key responses.')
+counters_cli = AppGroup('counters', help='Maintain the category and account expense counters.')
+tokens_cli = AppGroup('tokens', help='Maintain the revoked token list.')
+categories_cli = AppGroup('categories', help='Maintain the global categories.')
+
+# Columns that store amounts as integer minor units
+MONEY_COLUMNS = (
+    ('accounts', 'balance'),
+    ('expenses', 'amount'),
+    ('incomes', 'amount'),
+    ('expense_rollups', 'total'),
+)
+
+
+@rollups_cli.command('rebuild')
+def rebuild_rollups():
+    """Recompute expense rollups from the raw expenses table and verify them."""
+    from app.models.expense_rollup import ExpenseRollup
+
+    ExpenseRollup.rebuild()
+    click.echo('Rebuilt expense rollups.')
+    _report_rollup_mismatches(ExpenseRollup.mismatches())
+
+
+@rollups_cli.command('verify')
+def verify_rollups():
+    """Compare expense rollups with the raw expenses table."""
+    from app.models.expense_rollup import ExpenseRollup
+
+    _report_rollup_mismatches(ExpenseRollup.mismatches())
+
+
+def _report_rollup_mismatches(mismatches):
+    if not mismatches:
+        click.echo('Expense rollups match the expenses table.')
+        return
+
+    for key, expected, actual in mismatches:
+        click.echo(f'Mismatch {key}: expected {expected}, found {actual}', err=True)
+    raise click.ClickException(f'{len(mismatches)} expense rollup rows do not match')
+
+
+@money_cli.command('convert')
+def convert_money():
+    """Convert float money columns to integer minor units in place."""
+    from app import db
+
+    converted = convert_money_columns(db.engine)
+    if converted:
+        click.echo(f"Converted {', '.join(converted)} to minor units.")
+    else:
+        click.echo('Money columns already use minor units.')
+
+
+def convert_money_columns(engine):
+    """Rewrite float money columns as BIGINT minor units.
+
+    Columns that are already integers are skipped, so this is safe to run
+    on every deploy before the schema is autogenerated.
+    """
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from app.money import MINOR_UNITS
+
+    converted = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        operations = Operations(MigrationContext.configure(connection))
+
+        for table, column in MONEY_COLUMNS:
+            if not inspector.has_table(table):
+                continue
+
+            current_type = {col['name']: col['type'] for col in inspector.get_columns(table)}[column]
+            if isinstance(current_type, Integer):
+                continue
+
+            if connection.dialect.name == 'postgresql':
+                operations.alter_column(
+                    table, column,
+                    type_=BigInteger(),
+                    existing_type=current_type,
+                    postgresql_using=f'round({column} * {MINOR_UNITS})::bigint'
+                )
+            else:
+                connection.execute(text(
+                    f'UPDATE {table} SET {column} = CAST(round({column} * {MINOR_UNITS}) AS INTEGER)'
+                ))
+                with operations.batch_alter_table(table) as batch:
+                    batch.alter_column(column, type_=BigInteger(), existing_type=current_type)
+
+            converted.append(f'{table}.{column}')
+
+    return converted
+
+
+@ledger_cli.command('backfill')
+def backfill_ledger():
+    """Seed the balance ledger and checkpoints of accounts that predate them."""
+    from app import db
+    from app.models.account import Account
+    from app.models.balance_ledger import BalanceEntry
+
+    account_ids = db.session.execute(
+        db.select(Account.id).where(Account.ledger_entry_count == 0)
+    ).scalars().all()
+
+    seeded = 0
+    for account_id in account_ids:
+        if BalanceEntry.backfill(account_id):
+            seeded += 1
+        db.session.commit()
+    click.echo(f'Seeded the balance ledger of {seeded} accounts.')
+    _report_ledger_mismatches(BalanceEntry.mismatches())
+
+
+@ledger_cli.command('verify')
+def verify_ledger():
+    """Check that every account's ledger sums to its stored balance."""
+    from app.models.balance_ledger import BalanceEntry
+
+    _report_ledger_mismatches(BalanceEntry.mismatches())
+
+
+def _report_ledger_mismatches(mismatches):
+    if not mismatches:
+        click.echo('Balance ledger matches the account balances.')
+        return
+
+    for account_id, balance, ledger_total in mismatches:
+        click.echo(f'Mismatch {account_id}: balance {balance}, ledger {ledger_total}', err=True)
+    raise click.ClickException(f'{len(mismatches)} accounts do not match their ledger')
+
+
+@idempotency_cli.command('purge')
+def purge_idempotency_keys():
+    """Delete Idempotency-Key responses past their TTL."""
+    from app.models.idempotency_key import IdempotencyKey
+
+    removed = IdempotencyKey.purge_expired()
+    click.echo(f'Removed {removed} expired idempotency keys.')
+
+
+@counters_cli.command('rebuild')
+def rebuild_counters():
+    """Recompute expense counters from the raw expenses table and verify them."""
+    from app import usage_counters
+
+    usage_counters.rebuild()
+    click.echo('Rebuilt expense counters.')
+    _report_counter_mismatches(usage_counters.mismatches())
+
+
+@counters_cli.command('verify')
+def verify_counters():
+    """Compare expense counters with the raw expenses table."""
+    from app import usage_counters
+
+    _report_counter_mismatches(usage_counters.mismatches())
+
+
+def _report_counter_mismatches(mismatches):
+    if not mismatches:
+        click.echo('Expense counters match the expenses table.')
+        return
+
+    for table, row_id, expected, actual in mismatches:
+        click.echo(f'Mismatch {table} {row_id}: expected {expected}, found {actual}', err=True)
+    raise click.ClickException(f'{len(mismatches)} expense counters do not match')
+
+
+@tokens_cli.command('purge')
+def purge_revoked_tokens():
+    """Delete revoked tokens that have expired anyway."""
+    from app.models.revoked_token import RevokedToken
+
+    removed = RevokedToken.purge_expired()
+    click.echo(f'Removed {removed} expired revoked tokens.')
+
+
+@categories_cli.command('seed')
+def seed_categories():
+    """Insert the default global categories that are missing."""
+    from app.global_categories import ensure_global_categories
+
+    categories = ensure_global_categories()
+    click.echo(f'{len(categories)} global categories.')
+
+
+def register_commands(app):
+    """Register CLI command groups."""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(money_cli)
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(categories_cli)
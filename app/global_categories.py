@@ -0,0 +1,88 @@
+"""Global categories, seeded once and served from memory.
+
+The default global categories are inserted by `flask categories seed`,
+which init_db.sh runs after the schema upgrade, or else by the first
+request that needs them. A unique index on global category names keeps
+concurrent seeding from creating duplicates; the loser of that race
+rolls back and reads the winner's rows. The API never creates, changes
+or deletes global categories, so each worker loads them once, on first
+use, and answers every later read from memory. Nothing is read at app
+startup, so the app (and every flask command) starts against a
+database that hasn't been upgraded yet. Restart the workers after
+editing global categories by hand.
+"""
+import threading
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.query_budget import uncounted
+
+DEFAULT_GLOBAL_CATEGORIES = ('Food', 'Transportation', 'Entertainment', 'Utilities', 'Shopping')
+
+# Read-only view of a global category; enough for CategorySchema dumps
+GlobalCategory = namedtuple(
+    'GlobalCategory', ['id', 'name', 'is_global', 'user_id', 'expense_count', 'created_at']
+)
+
+
+def seed_global_categories(names):
+    """Insert global categories with the given names and commit.
+
+    Returns False when another process inserted one of them first.
+    """
+    from app.models.category import Category
+
+    db.session.add_all(Category(name=name, is_global=True) for name in names)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+def load_global_categories():
+    """Read all global categories, ordered by name."""
+    from app.models.category import Category
+
+    rows = db.session.execute(
+        db.select(*(getattr(Category, field) for field in GlobalCategory._fields))
+        .where(Category.is_global.is_(True))
+        .order_by(Category.name)
+    ).all()
+    return tuple(GlobalCategory(*row) for row in rows)
+
+
+def ensure_global_categories():
+    """Seed the missing default global categories and return all of them."""
+    categories = load_global_categories()
+    missing = set(DEFAULT_GLOBAL_CATEGORIES) - {category.name for category in categories}
+    if missing:
+        seed_global_categories(sorted(missing))
+        categories = load_global_categories()
+    return categories
+
+
+def init_global_categories(app):
+    """Set up the app's global category cache, filled on first use."""
+    app.extensions['global_categories'] = None
+    app.extensions['global_categories_lock'] = threading.Lock()
+
+
+def global_categories():
+    """The current app's global categories, ordered by name."""
+    categories = current_app.extensions['global_categories']
+    if categories is not None:
+        return categories
+
+    with current_app.extensions['global_categories_lock']:
+        categories = current_app.extensions['global_categories']
+        if categories is None:
+            # Once per process, so it stays out of the request's query budget
+            with uncounted():
+                categories = ensure_global_categories()
+            current_app.extensions['global_categories'] = categories
+    return categories
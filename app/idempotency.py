@@ -0,0 +1,127 @@
+"""Idempotency-Key support for money-moving POST routes.
+
+The key is claimed by inserting an in-progress row in the same
+transaction as the write itself. The route's own commits only flush,
+and its response is stored on the claimed row before the one real
+commit, so the expense or income, its key and the stored response
+commit together: a concurrent duplicate blocks on the primary key and
+then finds the finished key, and a crash can never leave a write
+without its key or a key stuck in progress. Stored responses are
+replayed for retries with the same key until the key expires. Failed
+requests (4xx/5xx) roll the claim back with everything else, so they
+can be retried.
+"""
+import hashlib
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from flask_smorest import abort
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+DEFAULT_TTL = 24 * 60 * 60
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint():
+    """Hash of everything that makes two requests the same request."""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b' ' + request.path.encode() + b'\n')
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+@contextmanager
+def _deferred_commit():
+    """Make commits inside the block flush instead, leaving the commit to the caller."""
+    session = db.session()
+    session.commit = session.flush
+    try:
+        yield
+    finally:
+        del session.commit
+
+
+def _replay(stored, request_hash):
+    if stored is None:
+        # The concurrent request failed and released the key
+        abort(409, message="A request with this Idempotency-Key is still in progress")
+
+    if stored.request_hash != request_hash:
+        abort(422, message="Idempotency-Key was already used with a different request")
+
+    if not stored.completed:
+        abort(409, message="A request with this Idempotency-Key is still in progress")
+
+    response = current_app.response_class(
+        stored.response_body,
+        status=stored.status_code,
+        mimetype='application/json'
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Make a POST route safe to retry with an Idempotency-Key header.
+
+    Must be applied inside jwt_required() and outside the flask-smorest
+    decorators, so replays skip validation and see the final Response.
+    Requests without the header run unchanged.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from app.models.idempotency_key import IdempotencyKey
+
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            abort(400, message=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+        user_id = get_jwt_identity()
+        request_hash = request_fingerprint()
+
+        stored = db.session.get(IdempotencyKey, (user_id, key))
+        if stored is not None and stored.is_expired():
+            db.session.delete(stored)
+            db.session.flush()
+            stored = None
+
+        if stored is not None:
+            return _replay(stored, request_hash)
+
+        try:
+            IdempotencyKey.claim(
+                user_id,
+                key,
+                request_hash,
+                current_app.config.get('IDEMPOTENCY_KEY_TTL', DEFAULT_TTL)
+            )
+        except IntegrityError:
+            # A concurrent request with the same key committed first
+            db.session.rollback()
+            return _replay(db.session.get(IdempotencyKey, (user_id, key)), request_hash)
+
+        try:
+            with _deferred_commit():
+                response = view(*args, **kwargs)
+
+            if response.status_code >= 300:
+                db.session.rollback()
+                return response
+
+            IdempotencyKey.complete(user_id, key, response.status_code, response.get_data(as_text=True))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return response
+
+    return wrapper
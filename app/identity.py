@@ -0,0 +1,60 @@
+"""Per-process cache of the users behind JWT identities.
+
+The JWT user_lookup_loader runs on every authenticated request, so it
+is answered from a small LRU of user snapshots instead of a SELECT on
+users. Entries live for IDENTITY_CACHE_TTL seconds; user_routes drops a
+user's entry when the user is updated or deleted, and other workers
+catch up within the TTL. Set IDENTITY_CACHE_TTL to 0 to disable it.
+"""
+from collections import namedtuple
+
+from flask import current_app
+
+from app import db
+from app.cache import LocalCache
+
+# Read-only view of a user; enough for current_user and UserSchema dumps
+Identity = namedtuple('Identity', ['id', 'name', 'email', 'created_at'])
+
+
+def init_identity_cache(app):
+    """Create the identity cache configured for `app`."""
+    cache = None
+    if app.config.get('IDENTITY_CACHE_TTL'):
+        cache = LocalCache(app.config.get('IDENTITY_CACHE_SIZE', 10000), app.config['IDENTITY_CACHE_TTL'])
+    app.extensions['identity_cache'] = cache
+    return cache
+
+
+def load_identity(user_id):
+    """Identity of a user, or None when the user doesn't exist."""
+    from app.models.user import User
+
+    cache = current_app.extensions['identity_cache']
+    identity = cache.get(user_id) if cache is not None else None
+    if identity is not None:
+        return identity
+
+    row = db.session.execute(
+        db.select(User.id, User.name, User.email, User.created_at).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+
+    identity = Identity(*row)
+    if cache is not None:
+        cache.set(user_id, identity)
+    return identity
+
+
+def invalidate_identity(user_id):
+    """Drop a user's cached identity after it changed or was deleted."""
+    cache = current_app.extensions['identity_cache']
+    if cache is not None:
+        cache.delete(user_id)
+
+
+def identity_cache_stats():
+    """Hit/miss counters of this process's identity cache, or None when disabled."""
+    cache = current_app.extensions['identity_cache']
+    return cache.stats() if cache is not None else None
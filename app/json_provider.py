@@ -0,0 +1,46 @@
+"""JSON provider backed by orjson when it is installed."""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Serialize responses with orjson, keeping Flask's default output shape.
+
+    Keys stay sorted, output stays compact and types orjson does not
+    handle natively (dates, decimals, ...) go through Flask's default
+    conversion. Falls back to the standard library in debug mode, when
+    extra json.dumps options are passed, or if orjson is missing.
+
+    Unlike Flask's default, non-ASCII text is written as UTF-8 rather
+    than \\uXXXX escapes, as orjson can't escape it. The stdlib fallback
+    does the same, so the encoding doesn't depend on which path served a
+    body. Bodies parse to the same values as with Flask's provider but
+    are not byte-identical for non-ASCII data.
+    """
+    ensure_ascii = False
+
+    def _orjson_options(self):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _use_orjson(self):
+        return orjson is not None and self.compact is not False and not self._app.debug
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or not self._use_orjson():
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode()
+
+    def response(self, *args, **kwargs):
+        if not self._use_orjson():
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_options()) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -3,5 +3,10 @@ from app.models.category import Category
 from app.models.account import Account
 from app.models.income import Income
 from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseRollup
+from app.models.idempotency_key import IdempotencyKey
+from app.models.balance_ledger import BalanceEntry, BalanceCheckpoint
+from app.models.revoked_token import RevokedToken
 
-__all__ = ['User', 'Category', 'Account', 'Income', 'Expense']
\ No newline at end of file
+__all__ = ['User', 'Category', 'Account', 'Income', 'Expense', 'ExpenseRollup', 'IdempotencyKey',
+           'BalanceEntry', 'BalanceCheckpoint', 'RevokedToken']
\ No newline at end of file
@@ -1,20 +1,31 @@
 from app import db
+from app.money import MAX_BALANCE, from_minor_units
 from datetime import datetime
+from sqlalchemy.orm.attributes import set_committed_value
 import uuid
 
 class Account(db.Model):
     """Account model for tracking income and expenses."""
     __tablename__ = 'accounts'
+    __table_args__ = (
+        db.Index('ix_accounts_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    balance = db.Column(db.Float, default=0.0, nullable=False)
+    balance = db.Column(db.BigInteger, default=0, nullable=False)  # minor units (cents)
+    # Number of balance ledger entries, used to place checkpoints
+    ledger_entry_count = db.Column(db.BigInteger, default=0, nullable=False, server_default='0')
+    # Expenses drawn from this account (see app.usage_counters)
+    expense_count = db.Column(db.BigInteger, default=0, nullable=False, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     incomes = db.relationship('Income', backref='account', lazy=True, cascade='all, delete-orphan')
     expenses = db.relationship('Expense', backref='account', lazy=True, cascade='all, delete-orphan')
+    balance_entries = db.relationship('BalanceEntry', lazy=True, cascade='all, delete-orphan')
+    balance_checkpoints = db.relationship('BalanceCheckpoint', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Account {self.id} - User {self.user_id}>'
@@ -23,13 +34,14 @@ class Account(db.Model):
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'balance': self.balance,
+            'balance': from_minor_units(self.balance),
+            'expense_count': self.expense_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def add_income(self, amount, description=""):
-        """Add income to account."""
+        """Add income (in minor units) to account."""
         from app.models.income import Income
         if amount <= 0:
             raise ValueError("Income amount must be positive")
@@ -39,20 +51,76 @@ class Account(db.Model):
             amount=amount,
             description=description
         )
-        self.balance += amount
+        self.deposit(amount)
         return income
     
     def can_withdraw(self, amount):
         """Check if account has sufficient funds."""
         return self.balance >= amount
     
+    def deposit(self, amount):
+        """Atomically add amount to the stored balance."""
+        if amount <= 0:
+            raise ValueError("Deposit amount must be positive")
+        
+        if not self._change_balance(amount, maximum=MAX_BALANCE - amount):
+            raise ValueError("Balance would exceed the maximum")
+        return True
+    
     def withdraw(self, amount):
-        """Withdraw amount from account."""
+        """Atomically withdraw amount if the stored balance covers it."""
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive")
         
-        if not self.can_withdraw(amount):
+        if not self._change_balance(-amount, minimum=amount):
             raise ValueError("Insufficient funds")
         
-        self.balance -= amount
+        return True
+    
+    def balance_at(self, at):
+        """Balance at a point in time, from the ledger checkpoints."""
+        from app.models.balance_ledger import BalanceCheckpoint
+        return BalanceCheckpoint.balance_at(self.id, at)
+    
+    def _change_balance(self, delta, minimum=None, maximum=None):
+        """Apply delta in a single UPDATE, optionally guarded by minimum <= balance <= maximum.
+        
+        The new balance comes back through RETURNING, so concurrent writers
+        never overwrite each other with a stale value read into Python.
+        Every change is appended to the balance ledger, with a checkpoint of
+        the new balance every BalanceCheckpoint.INTERVAL entries.
+        Returns False if the guard rejected the update.
+        """
+        from app.models.balance_ledger import BalanceEntry, BalanceCheckpoint
+        
+        table = Account.__table__
+        statement = table.update().where(table.c.id == self.id)
+        if minimum is not None:
+            statement = statement.where(table.c.balance >= minimum)
+        if maximum is not None:
+            statement = statement.where(table.c.balance <= maximum)
+        statement = statement.values(
+            balance=table.c.balance + delta,
+            ledger_entry_count=table.c.ledger_entry_count + 1,
+            updated_at=datetime.utcnow()
+        ).returning(table.c.balance, table.c.ledger_entry_count)
+        
+        row = db.session.execute(statement).first()
+        if row is None:
+            return False
+        
+        # Timestamp taken while holding the account row lock, so ledger
+        # entries of one account are ordered like the updates themselves
+        created_at = datetime.utcnow()
+        entry_id = BalanceEntry.append(self.id, delta, created_at)
+        if row.ledger_entry_count % BalanceCheckpoint.INTERVAL == 0:
+            db.session.add(BalanceCheckpoint(
+                account_id=self.id,
+                entry_id=entry_id,
+                created_at=created_at,
+                balance=row.balance
+            ))
+        
+        set_committed_value(self, 'balance', row.balance)
+        set_committed_value(self, 'ledger_entry_count', row.ledger_entry_count)
         return True
\ No newline at end of file
@@ -0,0 +1,152 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import func, select, tuple_
+
+class BalanceEntry(db.Model):
+    """Append-only record of every change to an account balance."""
+    __tablename__ = 'balance_entries'
+    __table_args__ = (
+        # Backs the delta sum after the nearest checkpoint
+        db.Index('ix_balance_entries_account_id_created_at', 'account_id', 'created_at', 'id'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)  # signed minor units (cents)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<BalanceEntry {self.account_id} {self.amount:+}>'
+
+    @classmethod
+    def append(cls, account_id, amount, created_at):
+        """Insert an entry and return its id."""
+        result = db.session.execute(cls.__table__.insert().values(
+            account_id=account_id,
+            amount=amount,
+            created_at=created_at
+        ))
+        return result.inserted_primary_key[0]
+
+    @classmethod
+    def backfill(cls, account_id):
+        """Seed the ledger of an account that predates it.
+
+        Replays the account's incomes and expenses, then appends one
+        adjustment entry for whatever edits and deletions the raw tables no
+        longer show, so the ledger sums to the stored balance. Returns the
+        number of entries written, or 0 if the account already has a ledger.
+        """
+        from app.models.account import Account
+        from app.models.expense import Expense
+        from app.models.income import Income
+
+        # Lock the account so no live balance change interleaves
+        account = db.session.execute(
+            select(Account.__table__).where(Account.id == account_id).with_for_update()
+        ).one()
+        if account.ledger_entry_count:
+            return 0
+
+        movements = db.session.execute(
+            select(Income.amount, Income.created_at).where(Income.account_id == account_id)
+            .union_all(select(-Expense.amount, Expense.created_at).where(Expense.account_id == account_id))
+            .order_by('created_at')
+        ).all()
+        entries = [
+            {'account_id': account_id, 'amount': amount, 'created_at': created_at or account.created_at}
+            for amount, created_at in movements
+        ]
+
+        adjustment = account.balance - sum(entry['amount'] for entry in entries)
+        if adjustment:
+            entries.append({'account_id': account_id, 'amount': adjustment, 'created_at': datetime.utcnow()})
+        if not entries:
+            return 0
+
+        db.session.execute(cls.__table__.insert(), entries)
+        db.session.execute(
+            Account.__table__.update().where(Account.id == account_id).values(ledger_entry_count=len(entries))
+        )
+        BalanceCheckpoint.rebuild(account_id)
+        return len(entries)
+
+    @classmethod
+    def mismatches(cls):
+        """Accounts whose ledger does not sum to the stored balance.
+
+        Returns a list of (account_id, balance, ledger_total) tuples.
+        """
+        from app.models.account import Account
+
+        totals = select(cls.account_id, func.sum(cls.amount).label('total')) \
+            .group_by(cls.account_id).subquery()
+        ledger_total = func.coalesce(totals.c.total, 0)
+        return db.session.execute(
+            select(Account.id, Account.balance, ledger_total)
+            .outerjoin(totals, totals.c.account_id == Account.id)
+            .where(ledger_total != Account.balance)
+        ).all()
+
+class BalanceCheckpoint(db.Model):
+    """Account balance including every ledger entry up to (created_at, entry_id)."""
+    __tablename__ = 'balance_checkpoints'
+    __table_args__ = (
+        db.Index('ix_balance_checkpoints_account_id_created_at', 'account_id', 'created_at', 'entry_id'),
+    )
+
+    # Ledger entries between two checkpoints of an account
+    INTERVAL = 100
+
+    account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), primary_key=True)
+    entry_id = db.Column(db.BigInteger, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    balance = db.Column(db.BigInteger, nullable=False)  # minor units (cents)
+
+    def __repr__(self):
+        return f'<BalanceCheckpoint {self.account_id} {self.created_at}>'
+
+    @classmethod
+    def balance_at(cls, account_id, at):
+        """Balance of an account at `at`: nearest checkpoint plus the entries after it."""
+        checkpoint = cls.query.filter(
+            cls.account_id == account_id,
+            cls.created_at <= at
+        ).order_by(cls.created_at.desc(), cls.entry_id.desc()).first()
+
+        delta = select(func.coalesce(func.sum(BalanceEntry.amount), 0)).where(
+            BalanceEntry.account_id == account_id,
+            BalanceEntry.created_at <= at
+        )
+        if checkpoint is None:
+            return db.session.execute(delta).scalar()
+
+        delta = delta.where(
+            tuple_(BalanceEntry.created_at, BalanceEntry.id) > tuple_(checkpoint.created_at, checkpoint.entry_id)
+        )
+        return checkpoint.balance + db.session.execute(delta).scalar()
+
+    @classmethod
+    def rebuild(cls, account_id):
+        """Recompute the checkpoints of an account from its ledger entries."""
+        table = cls.__table__
+        db.session.execute(table.delete().where(table.c.account_id == account_id))
+
+        entries = db.session.execute(
+            select(BalanceEntry.id, BalanceEntry.amount, BalanceEntry.created_at)
+            .where(BalanceEntry.account_id == account_id)
+            .order_by(BalanceEntry.created_at, BalanceEntry.id)
+        )
+        balance = 0
+        checkpoints = []
+        for count, entry in enumerate(entries, start=1):
+            balance += entry.amount
+            if count % cls.INTERVAL == 0:
+                checkpoints.append({
+                    'account_id': account_id,
+                    'entry_id': entry.id,
+                    'created_at': entry.created_at,
+                    'balance': balance
+                })
+        if checkpoints:
+            db.session.execute(table.insert(), checkpoints)
@@ -5,15 +5,28 @@ import uuid
 class Category(db.Model):
     """Expense category model."""
     __tablename__ = 'categories'
+    __table_args__ = (
+        # Backs per-user category lookups such as the stats category count
+        db.Index('ix_categories_user_id', 'user_id'),
+        # One global category per name, so concurrent seeding can't duplicate them
+        db.Index(
+            'uq_categories_global_name', 'name', unique=True,
+            postgresql_where=db.text('is_global'), sqlite_where=db.text('is_global')
+        ),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(50), nullable=False)
     is_global = db.Column(db.Boolean, default=True)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
+    # Expenses filed under a personal category, set when it is created;
+    # NULL for global categories (see app.usage_counters)
+    expense_count = db.Column(db.BigInteger)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     expenses = db.relationship('Expense', backref='category', lazy=True, cascade='all, delete-orphan')
+    expense_rollups = db.relationship('ExpenseRollup', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Category {self.name}>'
@@ -24,5 +37,6 @@ class Category(db.Model):
             'name': self.name,
             'is_global': self.is_global,
             'user_id': self.user_id,
+            'expense_count': self.expense_count,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
\ No newline at end of file
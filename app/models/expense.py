@@ -1,16 +1,24 @@
 from app import db
+from app.money import from_minor_units
 from datetime import datetime
+from sqlalchemy import DDL, event, func
 import uuid
 
 class Expense(db.Model):
     """Expense record model."""
     __tablename__ = 'expenses'
+    __table_args__ = (
+        # Backs the per-user listing, summary and keyset pagination
+        db.Index('ix_expenses_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_expenses_account_id_created_at', 'account_id', 'created_at', 'id'),
+        db.Index('ix_expenses_category_id_created_at', 'category_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     category_id = db.Column(db.String(36), db.ForeignKey('categories.id'), nullable=False)
     account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)  # minor units (cents)
     description = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -23,7 +31,39 @@ class Expense(db.Model):
             'user_id': self.user_id,
             'category_id': self.category_id,
             'account_id': self.account_id,
-            'amount': self.amount,
+            'amount': from_minor_units(self.amount),
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+# Full-text search over descriptions. PostgreSQL gets a GIN index on the
+# tsvector expression; SQLite (local and test runs) gets an FTS5 shadow
+# table kept in sync by triggers.
+description_tsvector = func.to_tsvector('simple', func.coalesce(Expense.description, ''))
+
+db.Index(
+    'ix_expenses_description_tsvector',
+    description_tsvector,
+    postgresql_using='gin'
+).ddl_if(dialect='postgresql')
+
+EXPENSES_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts "
+    "USING fts5(description, content='expenses', content_rowid='rowid')",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN "
+    "INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN "
+    "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE OF description ON expenses BEGIN "
+    "INSERT INTO expenses_fts(expenses_fts, rowid, description) VALUES ('delete', old.rowid, old.description); "
+    "INSERT INTO expenses_fts(rowid, description) VALUES (new.rowid, new.description); END",
+)
+
+for statement in EXPENSES_FTS_DDL:
+    event.listen(Expense.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+event.listen(
+    Expense.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS expenses_fts').execute_if(dialect='sqlite')
+)
@@ -0,0 +1,138 @@
+from app import db
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+class ExpenseRollup(db.Model):
+    """Monthly per-category expense totals, maintained on every expense write."""
+    __tablename__ = 'expense_rollups'
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    category_id = db.Column(db.String(36), db.ForeignKey('categories.id'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    total = db.Column(db.BigInteger, default=0, nullable=False)  # minor units (cents)
+    expense_count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<ExpenseRollup {self.user_id} {self.category_id} {self.month}>'
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'category_id': self.category_id,
+            'month': self.month,
+            'total': self.total,
+            'expense_count': self.expense_count
+        }
+
+    @staticmethod
+    def month_of(created_at):
+        """Rollup month key for an expense timestamp."""
+        return created_at.strftime('%Y-%m')
+
+    @classmethod
+    def record(cls, user_id, category_id, created_at, amount, count=1):
+        """Add `amount` and `count` to the rollup row of an expense.
+
+        Uses a single INSERT ... ON CONFLICT DO UPDATE so concurrent writers
+        to the same (user, category, month) never lose an increment. Pass a
+        negative amount and count to remove an expense.
+        """
+        table = cls.__table__
+        month = cls.month_of(created_at)
+        cls.record_many(user_id, {(category_id, created_at): (amount, count)})
+
+        # Drop rows that no longer cover any expense
+        if count < 0:
+            db.session.execute(table.delete().where(
+                table.c.user_id == user_id,
+                table.c.category_id == category_id,
+                table.c.month == month,
+                table.c.expense_count <= 0
+            ))
+
+    @classmethod
+    def record_many(cls, user_id, deltas):
+        """Add (amount, count) deltas keyed by (category_id, created_at) in one statement.
+
+        Deltas falling in the same rollup row must be merged by the caller,
+        as one INSERT ... ON CONFLICT can't update a row twice. Rows left
+        empty by negative deltas are not removed; use record() for those.
+        """
+        if not deltas:
+            return
+
+        table = cls.__table__
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+
+        statement = insert(table).values([
+            {
+                'user_id': user_id,
+                'category_id': category_id,
+                'month': cls.month_of(created_at),
+                'total': amount,
+                'expense_count': count
+            }
+            for (category_id, created_at), (amount, count) in deltas.items()
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.category_id, table.c.month],
+            set_={
+                'total': table.c.total + statement.excluded.total,
+                'expense_count': table.c.expense_count + statement.excluded.expense_count
+            }
+        )
+        db.session.execute(statement)
+
+    @classmethod
+    def record_expense(cls, expense, sign=1):
+        """Add (sign=1) or remove (sign=-1) an expense from the rollups."""
+        cls.record(expense.user_id, expense.category_id, expense.created_at, sign * expense.amount, sign)
+
+    @staticmethod
+    def _raw_totals_query():
+        from app.models.expense import Expense
+        from app.sql import month_key
+
+        month = month_key(Expense.created_at)
+        return select(
+            Expense.user_id,
+            Expense.category_id,
+            month,
+            func.sum(Expense.amount),
+            func.count(Expense.id)
+        ).where(Expense.created_at.isnot(None)).group_by(Expense.user_id, Expense.category_id, month)
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every rollup row from the raw expenses table."""
+        table = cls.__table__
+        db.session.execute(table.delete())
+        db.session.execute(table.insert().from_select(
+            [table.c.user_id, table.c.category_id, table.c.month, table.c.total, table.c.expense_count],
+            cls._raw_totals_query()
+        ))
+        db.session.commit()
+
+    @classmethod
+    def mismatches(cls):
+        """Compare the rollups with the raw expenses table.
+
+        Returns a list of (key, expected, actual) tuples where expected and
+        actual are (total, count) pairs, or None for a missing row.
+        """
+        expected = {
+            (user_id, category_id, month): (total, count)
+            for user_id, category_id, month, total, count in db.session.execute(cls._raw_totals_query())
+        }
+        actual = {
+            (row.user_id, row.category_id, row.month): (row.total, row.expense_count)
+            for row in cls.query.filter(cls.expense_count > 0)
+        }
+
+        problems = []
+        for key in expected.keys() | actual.keys():
+            want, got = expected.get(key), actual.get(key)
+            if want != got:
+                problems.append((key, want, got))
+        return problems
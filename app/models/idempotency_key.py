@@ -0,0 +1,62 @@
+from app import db
+from datetime import datetime, timedelta
+
+class IdempotencyKey(db.Model):
+    """Stored response of a money-moving POST, keyed by the client's Idempotency-Key."""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        # Backs the purge of expired keys
+        db.Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # Null while the original request is still running
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.user_id} {self.key}>'
+
+    @property
+    def completed(self):
+        return self.status_code is not None
+
+    def is_expired(self, now=None):
+        return self.expires_at <= (now or datetime.utcnow())
+
+    @classmethod
+    def claim(cls, user_id, key, request_hash, ttl):
+        """Add an in-progress key to the current transaction (flushed, not committed)."""
+        now = datetime.utcnow()
+        claim = cls(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl)
+        )
+        db.session.add(claim)
+        db.session.flush()
+        return claim
+
+    @classmethod
+    def complete(cls, user_id, key, status_code, response_body):
+        """Store the response of a claimed key."""
+        table = cls.__table__
+        db.session.execute(table.update().where(
+            table.c.user_id == user_id,
+            table.c.key == key
+        ).values(status_code=status_code, response_body=response_body))
+
+    @classmethod
+    def purge_expired(cls, now=None):
+        """Delete expired keys and return how many were removed."""
+        result = db.session.execute(
+            cls.__table__.delete().where(cls.__table__.c.expires_at <= (now or datetime.utcnow()))
+        )
+        db.session.commit()
+        return result.rowcount
@@ -1,14 +1,19 @@
 from app import db
+from app.money import from_minor_units
 from datetime import datetime
 import uuid
 
 class Income(db.Model):
     """Income model for tracking money additions to account."""
     __tablename__ = 'incomes'
+    __table_args__ = (
+        # Backs the income listing and the keyset-paged account statement
+        db.Index('ix_incomes_account_id_created_at', 'account_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)  # minor units (cents)
     description = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -19,7 +24,7 @@ class Income(db.Model):
         return {
             'id': self.id,
             'account_id': self.account_id,
-            'amount': self.amount,
+            'amount': from_minor_units(self.amount),
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
\ No newline at end of file
@@ -0,0 +1,38 @@
+from app import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    """A JWT revoked before its expiry, by its jti claim."""
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = (
+        # Back the incremental sync of other workers and the purge
+        db.Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+        db.Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
+
+    jti = db.Column(db.String(36), primary_key=True)
+    token_type = db.Column(db.String(10), nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
+
+    @classmethod
+    def revoked_since(cls, since, now=None):
+        """(jti, expires_at) of unexpired tokens revoked at or after `since` (None for all)."""
+        table = cls.__table__
+        query = db.select(table.c.jti, table.c.expires_at) \
+            .where(table.c.expires_at > (now or datetime.utcnow()))
+        if since is not None:
+            query = query.where(table.c.revoked_at >= since)
+        return db.session.execute(query).all()
+
+    @classmethod
+    def purge_expired(cls, now=None):
+        """Delete rows of tokens past their expiry and return how many were removed."""
+        result = db.session.execute(
+            cls.__table__.delete().where(cls.__table__.c.expires_at <= (now or datetime.utcnow()))
+        )
+        db.session.commit()
+        return result.rowcount
@@ -1,33 +1,65 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import DDL, event, func
 import uuid
-from passlib.hash import pbkdf2_sha256
+from app.passwords import password_hasher
 
 class User(db.Model):
     """User model."""
     __tablename__ = 'users'
+    __table_args__ = (
+        # Backs the keyset-paged user directory
+        db.Index('ix_users_created_at', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)  # Додано email
     password_hash = db.Column(db.String(255), nullable=False)  # Додано password_hash
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped by every write to the user's data; keys cached read responses
+    data_version = db.Column(db.Integer, default=0, nullable=False, server_default='0')
     
     # Relationships
     accounts = db.relationship('Account', backref='user', lazy=True, cascade='all, delete-orphan')
     categories = db.relationship('Category', backref='user', lazy=True, cascade='all, delete-orphan')
     expenses = db.relationship('Expense', backref='user', lazy=True, cascade='all, delete-orphan')
+    expense_rollups = db.relationship('ExpenseRollup', lazy=True, cascade='all, delete-orphan')
+    idempotency_keys = db.relationship('IdempotencyKey', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<User {self.email}>'
     
     def set_password(self, password):
-        """Hash and set password."""
-        self.password_hash = pbkdf2_sha256.hash(password)
+        """Hash and set password (in the password hashing pool)."""
+        self.password_hash = password_hasher().hash(password)
     
     def check_password(self, password):
-        """Verify password."""
-        return pbkdf2_sha256.verify(password, self.password_hash)
+        """Verify password, rehashing it if the configured cost changed.
+        
+        A rehash only updates the attribute; the caller commits it.
+        """
+        valid, new_hash = password_hasher().verify_and_update(password, self.password_hash)
+        if valid and new_hash:
+            self.password_hash = new_hash
+        return valid
+    
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """Invalidate the user's cached responses as part of the current transaction."""
+        db.session.execute(
+            cls.__table__.update()
+            .where(cls.__table__.c.id == user_id)
+            .values(data_version=cls.__table__.c.data_version + 1)
+        )
+    
+    @classmethod
+    def data_version_of(cls, user_id):
+        """Current data version of a user (0 for unknown users)."""
+        version = db.session.execute(
+            db.select(cls.__table__.c.data_version).where(cls.__table__.c.id == user_id)
+        ).scalar()
+        return version or 0
     
     def to_dict(self):
         """Convert user to dictionary."""
@@ -36,4 +68,50 @@ class User(db.Model):
             'name': self.name,
             'email': self.email,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+# User directory search. Case-insensitive exact email lookups and name
+# prefix searches use expression indexes on lower(); the pattern ops let
+# PostgreSQL serve LIKE 'prefix%' from the B-tree under any collation.
+db.Index('ix_users_lower_email', func.lower(User.email))
+db.Index(
+    'ix_users_lower_name',
+    func.lower(User.name).label('name_lower'),
+    postgresql_ops={'name_lower': 'text_pattern_ops'}
+)
+
+# Substring name search: PostgreSQL gets a pg_trgm GIN index; SQLite gets
+# an FTS5 trigram table of lower(name) kept in sync by triggers. The
+# trigram tokenizer only folds ASCII case, so names are stored lowercased
+# with the connection's Unicode lower() (see app.sql).
+event.listen(
+    User.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+db.Index(
+    'ix_users_name_trgm',
+    func.lower(User.name).label('name_lower'),
+    postgresql_using='gin',
+    postgresql_ops={'name_lower': 'gin_trgm_ops'}
+).ddl_if(dialect='postgresql')
+
+USERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(name_lower, tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, name_lower) VALUES (new.rowid, lower(new.name)); END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN "
+    "DELETE FROM users_fts WHERE rowid = old.rowid; END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name ON users BEGIN "
+    "UPDATE users_fts SET name_lower = lower(new.name) WHERE rowid = old.rowid; END",
+)
+
+for statement in USERS_FTS_DDL:
+    event.listen(User.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+event.listen(
+    User.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS users_fts').execute_if(dialect='sqlite')
+)
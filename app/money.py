@@ -0,0 +1,28 @@
+"""Conversion between API amounts and stored integer minor units."""
+from decimal import Decimal, ROUND_HALF_UP
+
+# Amounts are stored as integer cents
+MINOR_UNITS = 100
+
+# Largest amount the API accepts, in minor units. Balances are bigint
+# (int64); keeping single amounts far below that leaves room to add
+# them up, and deposits check the resulting balance against MAX_BALANCE.
+MAX_AMOUNT = 10 ** 15
+MAX_BALANCE = 2 ** 63 - 1
+
+
+def to_minor_units(value):
+    """Convert a decimal amount (e.g. 10.5) to integer minor units (1050)."""
+    minor = Decimal(str(value)) * MINOR_UNITS
+    return int(minor.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(value):
+    """Convert integer minor units (1050) back to a decimal amount (10.5).
+
+    SUM() over a bigint column comes back as Decimal on PostgreSQL; it is
+    coerced so every dialect dumps the same JSON number.
+    """
+    if value is None:
+        return None
+    return int(value) / MINOR_UNITS
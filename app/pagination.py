@@ -0,0 +1,82 @@
+"""Keyset (cursor) pagination helpers for list endpoints."""
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import request
+from flask_smorest import abort
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at, item_id, rank=None, carry=None):
+    """Encode a (created_at, id[, rank][, carry]) position as an opaque cursor string.
+
+    `carry` is an integer the next page needs besides its position, such
+    as a running total.
+    """
+    position = [created_at.isoformat(), item_id]
+    if rank is not None:
+        position.append(rank)
+    if carry is not None:
+        position.append(carry)
+    payload = json.dumps(position, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, ranked=False, carried=False):
+    """Decode a cursor produced by encode_cursor back into (created_at, id, rank, carry)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(position) != 2 + ranked + carried:
+            raise ValueError('Cursor does not match the query')
+        rank = float(position[2]) if ranked else None
+        carry = int(position[-1]) if carried else None
+        return datetime.fromisoformat(position[0]), str(position[1]), rank, carry
+    except (ValueError, TypeError):
+        abort(400, message="Invalid pagination cursor")
+
+
+def keyset_page(query, created_column, id_column, limit, cursor=None, rank=None):
+    """Return one page of `query` ordered newest first and the next cursor.
+
+    Rows are ordered by (created_at, id) descending so that the position
+    of the last row on the page uniquely identifies where the next page
+    starts, regardless of how deep the client has scrolled. When a `rank`
+    expression is given (e.g. search relevance) it becomes the leading
+    sort key and is carried in the cursor.
+
+    `query` must select plain columns (see RowSerializer.select) that
+    include the created_at and id columns; the rank is appended as an
+    extra `rank` column that callers can ignore.
+    """
+    columns = [created_column, id_column]
+    if rank is not None:
+        columns.insert(0, rank)
+        query = query.add_columns(rank)
+
+    if cursor:
+        created_at, item_id, rank_value, _ = decode_cursor(cursor, ranked=rank is not None)
+        position = [created_at, item_id] if rank is None else [rank_value, created_at, item_id]
+        query = query.filter(tuple_(*columns) < tuple_(*position))
+
+    rows = query.order_by(*[column.desc() for column in columns]).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id, rank=last.rank if rank is not None else None)
+
+    return rows, next_cursor
+
+
+def next_page_headers(next_cursor):
+    """Build a Link header pointing at the page after the current one."""
+    if not next_cursor:
+        return {}
+
+    params = request.args.to_dict()
+    params['cursor'] = next_cursor
+    return {'Link': f'<{request.base_url}?{urlencode(params)}>; rel="next"'}
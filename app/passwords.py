@@ -0,0 +1,125 @@
+"""Password hashing off the request threads.
+
+pbkdf2 is pure CPU work that holds the GIL, so hashing inline lets a
+burst of logins starve every other request in the worker. Hashes are
+computed in a small process pool instead; the request thread only waits
+on the result. The number of jobs queued or running is bounded, and
+once the bound is reached new jobs are shed with PasswordHasherBusy,
+which the app answers with 503 and a Retry-After header.
+
+The pbkdf2 cost is PASSWORD_HASH_ROUNDS. Hashes made with fewer rounds
+still verify and are replaced on the user's next successful login.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from flask import current_app
+from passlib.context import CryptContext
+
+DEFAULT_ROUNDS = 29000
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many password hashes are queued; the request should be retried."""
+
+
+def _context(rounds):
+    return CryptContext(
+        schemes=['pbkdf2_sha256'],
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds
+    )
+
+
+def _lower_priority():
+    # Let the request threads win the CPU when hashing competes with them
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+
+def _hash(password, rounds):
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password, password_hash, rounds):
+    return _context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    """Runs pbkdf2 jobs in a bounded process pool.
+
+    With workers=0 jobs run inline on the calling thread, which keeps
+    the test suite free of subprocesses.
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, workers=2, queue_limit=32, timeout=10):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    def hash(self, password):
+        """Hash a password with the configured cost."""
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password, password_hash):
+        """Return (valid, new_hash); new_hash is set when the cost changed."""
+        return self._run(_verify_and_update, password, password_hash, self.rounds)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _executor(self):
+        # Created lazily, and again after a fork, so every gunicorn worker
+        # gets its own pool instead of one inherited from the master
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_lower_priority
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Password hashing queue is full')
+
+        try:
+            future = self._executor().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordHasherBusy('Password hashing timed out') from None
+
+
+def init_password_hasher(app):
+    """Attach the app's password hasher as app.extensions['password_hasher']."""
+    app.extensions['password_hasher'] = PasswordHasher(
+        rounds=app.config.get('PASSWORD_HASH_ROUNDS', DEFAULT_ROUNDS),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        queue_limit=app.config.get('PASSWORD_HASH_QUEUE_LIMIT', 32),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+    )
+
+
+def password_hasher():
+    """The current app's PasswordHasher."""
+    return current_app.extensions['password_hasher']
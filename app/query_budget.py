@@ -0,0 +1,116 @@
+"""Per-request SQL statement counting, query budgets and lazy-load detection.
+
+Every statement a request sends to the database is counted through the
+engine's before_cursor_execute event and reported in the X-Query-Count
+response header. Routes declare how many statements they may use with
+@query_budget; within such a route, exceeding the budget or lazy loading
+a relationship (the usual N+1 shape) is logged, or raised when
+QUERY_BUDGET_STRICT is set, as it is for the test suite. Budget overruns
+are only known once the view has run, so strict mode is meant for tests,
+not for production traffic.
+"""
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A route issued more SQL statements than its declared budget."""
+
+
+class LazyLoadError(RuntimeError):
+    """A route with a query budget lazy loaded a relationship."""
+
+
+def query_count():
+    """Statements executed so far in the current request."""
+    return g.get('_query_count', 0)
+
+
+@contextmanager
+def uncounted():
+    """Leave statements out of the request's count and budget.
+
+    For per-process housekeeping that happens to run inside whichever
+    request finds it due, such as the periodic revocation list sync.
+    """
+    count = query_count()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            g._query_count = count
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g._query_count = query_count() + 1
+
+
+def _check_lazy_load(orm_execute_state):
+    if not has_request_context() or g.get('_query_budget') is None:
+        return
+
+    if orm_execute_state.is_select and orm_execute_state.lazy_loaded_from is not None:
+        _report(LazyLoadError, f'Lazy load of {orm_execute_state.loader_strategy_path} in a budgeted route')
+
+
+def _report(error_class, message):
+    if current_app.config.get('QUERY_BUDGET_STRICT'):
+        raise error_class(message)
+    current_app.logger.warning(message)
+
+
+def init_query_counter(app):
+    """Count statements per request and report them in a response header."""
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _count_statement)
+
+    if not event.contains(Session, 'do_orm_execute', _check_lazy_load):
+        event.listen(Session, 'do_orm_execute', _check_lazy_load)
+
+    @app.before_request
+    def reset_query_count():
+        # g outlives the request when an app context was already pushed
+        g._query_count = 0
+        g._query_budget = None
+
+    @app.after_request
+    def add_query_count_header(response):
+        if app.config.get('QUERY_COUNT_HEADER'):
+            response.headers[QUERY_COUNT_HEADER] = str(query_count())
+        return response
+
+
+def query_budget(limit):
+    """Declare the most SQL statements a route may issue per request.
+
+    Apply it outermost (above jwt_required) so token user lookups count
+    too. Lazy relationship loads are also rejected inside the route.
+    Budget for the worst case, not the common one: a cold identity cache,
+    an expired Idempotency-Key and a balance ledger checkpoint.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g._query_budget = limit
+            response = view(*args, **kwargs)
+
+            count = query_count()
+            if count > limit:
+                _report(
+                    QueryBudgetExceeded,
+                    f'{view.__qualname__} issued {count} SQL statements, over its budget of {limit}'
+                )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,103 @@
+"""JWT revocation with in-memory checks.
+
+Revoked tokens are stored in the revoked_tokens table and mirrored into
+every worker's RevocationList, a dict of jti -> expiry. The
+token_in_blocklist_loader therefore answers "not revoked" with a dict
+probe instead of a query per request. A token revoked in this process
+is blocked at once; other workers pick it up on their next sync, at
+most REVOCATION_SYNC_INTERVAL seconds later. Entries drop out of memory
+once the token would have expired anyway.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.query_budget import uncounted
+
+DEFAULT_SYNC_INTERVAL = 5
+# Re-read revocations this far behind the previous sync, so rows that
+# commit some time after their revoked_at are not skipped
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class RevocationList:
+    """Per-process mirror of the revoked_tokens table."""
+
+    def __init__(self, sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._expiry = {}
+        self._lock = threading.Lock()
+        self._synced_until = None
+        self._next_sync = 0
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def add(self, jti, expires_at):
+        self._expiry[jti] = expires_at
+
+    def is_revoked(self, jti, now=None):
+        """Whether a token is revoked; syncs with the table when due."""
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+
+        expires_at = self._expiry.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= (now or datetime.utcnow()):
+            self._expiry.pop(jti, None)
+            return False
+        return True
+
+    def sync(self, now=None):
+        """Load revocations made since the last sync and drop expired entries."""
+        from app.models.revoked_token import RevokedToken
+
+        # One thread syncs; the others keep answering from memory meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            now = now or datetime.utcnow()
+            since = self._synced_until - SYNC_OVERLAP if self._synced_until else None
+            with uncounted():
+                revoked = RevokedToken.revoked_since(since, now)
+            for jti, expires_at in revoked:
+                self._expiry[jti] = expires_at
+            self._synced_until = now
+
+            for jti, expires_at in list(self._expiry.items()):
+                if expires_at <= now:
+                    self._expiry.pop(jti, None)
+            self._next_sync = time.monotonic() + self.sync_interval
+        finally:
+            self._lock.release()
+
+
+def init_revocation_list(app):
+    """Create the app's RevocationList as app.extensions['revocation_list']."""
+    revocations = RevocationList(app.config.get('REVOCATION_SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL))
+    app.extensions['revocation_list'] = revocations
+    return revocations
+
+
+def revocation_list():
+    return current_app.extensions['revocation_list']
+
+
+def revoke_token(jwt_payload):
+    """Revoke a decoded token until its expiry, here and (after a sync) in every worker."""
+    from app.models.revoked_token import RevokedToken
+
+    expires_at = datetime.utcfromtimestamp(jwt_payload['exp'])
+    db.session.merge(RevokedToken(
+        jti=jwt_payload['jti'],
+        token_type=jwt_payload['type'],
+        revoked_at=datetime.utcnow(),
+        expires_at=expires_at
+    ))
+    db.session.commit()
+    revocation_list().add(jwt_payload['jti'], expires_at)
@@ -1,21 +1,48 @@
+from datetime import timezone
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.account import Account
 from app.models.income import Income
+from app.models.expense import Expense
+from app.models.balance_ledger import BalanceEntry, BalanceCheckpoint
 from app.models.user import User
 from app.schemas.account_schema import (
     AccountSchema, 
     AccountQuerySchema, 
     IncomeSchema,
-    IncomeQuerySchema
+    IncomeQuerySchema,
+    IncomeExportQuerySchema,
+    AccountBalanceQuerySchema,
+    StatementQuerySchema,
+    StatementEntrySchema
 )
+from app.export import stream_export
+from app.money import from_minor_units
+from app.pagination import next_page_headers
+from app.statement import statement_page
+from app.serializers import RowSerializer
+from app.cache import versioned_response
+from app.identity import load_identity
+from app.idempotency import idempotent
+from app.query_budget import query_budget
 
 account_bp = Blueprint('accounts', __name__, url_prefix='/api/accounts', description='Operations on accounts')
 
+def filter_incomes(query, args):
+    """Apply the income list filters to a query."""
+    if 'start_date' in args:
+        query = query.filter(Income.created_at >= args['start_date'])
+    
+    if 'end_date' in args:
+        query = query.filter(Income.created_at <= args['end_date'])
+    
+    return query
+
 @account_bp.route('/')
 class Accounts(MethodView):
+    @query_budget(3)
     @jwt_required()
     @account_bp.arguments(AccountQuerySchema, location='query')
     @account_bp.response(200, AccountSchema(many=True))
@@ -30,7 +57,7 @@ class Accounts(MethodView):
             if args['user_id'] != current_user_id:
                 abort(403, message="You can only view your own accounts")
             
-            user = User.query.get(args['user_id'])
+            user = load_identity(args['user_id'])
             if not user:
                 abort(404, message="User not found")
             query = query.filter_by(user_id=args['user_id'])
@@ -38,7 +65,9 @@ class Accounts(MethodView):
             # If no user_id provided, show only current user's accounts
             query = query.filter_by(user_id=current_user_id)
         
-        return query.order_by(Account.created_at.desc()).all()
+        serializer = RowSerializer(AccountSchema, Account, only=args.get('fieldset'))
+        accounts = serializer.select(query).order_by(Account.created_at.desc()).all()
+        return serializer.response(accounts)
     
     @jwt_required()
     @account_bp.arguments(AccountSchema)
@@ -52,7 +81,7 @@ class Accounts(MethodView):
             abort(403, message="You can only create accounts for yourself")
         
         # Check if user exists
-        user = User.query.get(account_data['user_id'])
+        user = load_identity(account_data['user_id'])
         if not user:
             abort(404, message="User not found")
         
@@ -63,12 +92,14 @@ class Accounts(MethodView):
         
         account = Account(**account_data)
         db.session.add(account)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         
         return account
 
 @account_bp.route('/<account_id>')
 class AccountById(MethodView):
+    @query_budget(2)
     @jwt_required()
     @account_bp.response(200, AccountSchema)
     def get(self, account_id):
@@ -83,6 +114,7 @@ class AccountById(MethodView):
         
         return account
     
+    @query_budget(7)
     @jwt_required()
     @account_bp.response(204)
     def delete(self, account_id):
@@ -95,17 +127,27 @@ class AccountById(MethodView):
         if account.user_id != current_user_id:
             abort(403, message="You can only delete your own accounts")
         
-        # Check if account has transactions
-        if account.incomes or account.expenses:
+        # Check if account has transactions with indexed EXISTS probes
+        has_transactions = db.session.query(
+            Income.query.filter_by(account_id=account_id).exists() |
+            Expense.query.filter_by(account_id=account_id).exists()
+        ).scalar()
+        if has_transactions:
             abort(400, message="Cannot delete account with transactions")
         
-        db.session.delete(account)
+        # Bulk deletes, so the empty income and expense collections aren't loaded for the cascade
+        BalanceCheckpoint.query.filter_by(account_id=account_id).delete(synchronize_session=False)
+        BalanceEntry.query.filter_by(account_id=account_id).delete(synchronize_session=False)
+        Account.query.filter_by(id=account_id).delete(synchronize_session=False)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         return '', 204
 
 @account_bp.route('/<account_id>/income')
 class AccountIncome(MethodView):
+    @query_budget(11)
     @jwt_required()
+    @idempotent
     @account_bp.arguments(IncomeSchema)
     @account_bp.response(201, IncomeSchema)
     def post(self, income_data, account_id):
@@ -128,10 +170,12 @@ class AccountIncome(MethodView):
             abort(400, message=str(e))
         
         db.session.add(income)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         
         return income
     
+    @query_budget(3)
     @jwt_required()
     @account_bp.arguments(IncomeQuerySchema, location='query')
     @account_bp.response(200, IncomeSchema(many=True))
@@ -145,22 +189,60 @@ class AccountIncome(MethodView):
         if account.user_id != current_user_id:
             abort(403, message="You can only view income for your own accounts")
         
-        query = Income.query.filter_by(account_id=account_id)
+        query = filter_incomes(Income.query.filter_by(account_id=account_id), args)
         
-        if 'start_date' in args:
-            query = query.filter(Income.created_at >= args['start_date'])
+        serializer = RowSerializer(IncomeSchema, Income, only=args.get('fieldset'))
+        incomes = serializer.select(query).order_by(Income.created_at.desc()).all()
+        return serializer.response(incomes)
+
+@account_bp.route('/<account_id>/income/export')
+class AccountIncomeExport(MethodView):
+    @jwt_required()
+    @account_bp.arguments(IncomeExportQuerySchema, location='query')
+    def get(self, args, account_id):
+        """Stream income history for account as NDJSON or CSV."""
+        current_user_id = get_jwt_identity()
         
-        if 'end_date' in args:
-            query = query.filter(Income.created_at <= args['end_date'])
+        account = Account.query.get_or_404(account_id)
+        
+        # Users can only export income for their own accounts
+        if account.user_id != current_user_id:
+            abort(403, message="You can only view income for your own accounts")
+        
+        query = filter_incomes(Income.query.filter_by(account_id=account_id), args)
+        query = query.order_by(Income.created_at.desc(), Income.id.desc())
         
-        return query.order_by(Income.created_at.desc()).all()
+        return stream_export(query, IncomeSchema(), args['format'], f'income-{account_id}')
+
+@account_bp.route('/<account_id>/statement')
+class AccountStatement(MethodView):
+    @query_budget(4)
+    @jwt_required()
+    @versioned_response
+    @account_bp.arguments(StatementQuerySchema, location='query')
+    @account_bp.response(200, StatementEntrySchema(many=True))
+    def get(self, args, account_id):
+        """Get incomes and expenses of an account, newest first, with a running balance."""
+        current_user_id = get_jwt_identity()
+        
+        account = Account.query.get_or_404(account_id)
+        
+        # Users can only view statements of their own accounts
+        if account.user_id != current_user_id:
+            abort(403, message="You can only view statements of your own accounts")
+        
+        entries, next_cursor = statement_page(account, args['limit'], args.get('cursor'))
+        return entries, next_page_headers(next_cursor)
 
 @account_bp.route('/<account_id>/balance')
 class AccountBalance(MethodView):
+    @query_budget(5)
     @jwt_required()
+    @versioned_response
+    @account_bp.arguments(AccountBalanceQuerySchema, location='query')
     @account_bp.response(200)
-    def get(self, account_id):
-        """Get account balance."""
+    def get(self, args, account_id):
+        """Get account balance, now or at a point in time."""
         current_user_id = get_jwt_identity()
         
         account = Account.query.get_or_404(account_id)
@@ -169,9 +251,22 @@ class AccountBalance(MethodView):
         if account.user_id != current_user_id:
             abort(403, message="You can only view balance of your own accounts")
         
+        if 'at' not in args:
+            return {
+                "account_id": account_id,
+                "balance": from_minor_units(account.balance),
+                "user_id": account.user_id
+            }
+        
+        # Timestamps are stored as naive UTC
+        at = args['at']
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        
         return {
             "account_id": account_id,
-            "balance": account.balance,
+            "at": at.isoformat(),
+            "balance": from_minor_units(account.balance_at(at)),
             "user_id": account.user_id
         }
 
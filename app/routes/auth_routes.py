@@ -1,8 +1,14 @@
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, jwt_required, get_jwt, get_jwt_identity, get_current_user
+)
+from sqlalchemy import inspect
+from werkzeug.exceptions import HTTPException
 from app import db
 from app.models.user import User
+from app.passwords import PasswordHasherBusy
+from app.revocation import revoke_token
 from app.schemas.user_schema import UserSchema, LoginSchema
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth', description='Authentication operations')
@@ -24,36 +30,32 @@ class Register(MethodView):
             if existing_user_by_name:
                 abort(400, message="User with this name already exists")
             
-            # Create new user
+            # Hash only for registrations that can succeed, and with the
+            # connection returned to the pool while pbkdf2 runs
+            db.session.close()
             user = User(
                 name=user_data['name'],
                 email=user_data['email']
             )
             user.set_password(user_data['password'])
             
+            # Create new user
             db.session.add(user)
             db.session.flush()  # Get user ID without committing
             
-            # Create default account for user
+            # Create default account for user; the global categories are
+            # seeded once, not per user (see app.global_categories)
             from app.models.account import Account
             account = Account(user_id=user.id)
             db.session.add(account)
             
-            # Create default categories (if they don't exist)
-            from app.models.category import Category
-            default_categories = ['Food', 'Transportation', 'Entertainment', 'Utilities', 'Shopping']
-            for category_name in default_categories:
-                existing_category = Category.query.filter_by(
-                    name=category_name, 
-                    is_global=True
-                ).first()
-                if not existing_category:
-                    category = Category(name=category_name, is_global=True)
-                    db.session.add(category)
-            
             db.session.commit()
             return user
             
+        except (HTTPException, PasswordHasherBusy):
+            # Duplicates keep their 400; a full hashing queue its 503
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             abort(500, message=f"Failed to register user: {str(e)}")
@@ -66,7 +68,16 @@ class Login(MethodView):
         """Login user and get access token."""
         user = User.query.filter_by(email=login_data['email']).first()
         
+        # Return the connection to the pool while pbkdf2 runs, so a burst of
+        # logins can't hold every connection waiting on the hashing pool
+        db.session.close()
+        
         if user and user.check_password(login_data['password']):
+            # Persist a hash upgraded to the configured cost
+            if inspect(user).modified:
+                db.session.add(user)
+                db.session.commit()
+            
             access_token = create_access_token(identity=user.id)
             refresh_token = create_refresh_token(identity=user.id)
             
@@ -98,17 +109,16 @@ class UserProfile(MethodView):
     @auth_bp.response(200, UserSchema)
     def get(self):
         """Get current user profile."""
-        current_user_id = get_jwt_identity()
-        user = User.query.get_or_404(current_user_id)
-        return user
+        # Loaded (or served from the identity cache) by jwt_required
+        return get_current_user()
 
 @auth_bp.route('/logout')
 class Logout(MethodView):
-    @jwt_required()
+    @jwt_required(verify_type=False)
     @auth_bp.response(200)
     def post(self):
-        """Logout user."""
-        # Note: In production, you should add the token to a blacklist
+        """Logout user, revoking the access or refresh token sent."""
+        revoke_token(get_jwt())
         return {
             "message": "Successfully logged out"
         }
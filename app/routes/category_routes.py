@@ -2,37 +2,45 @@ from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.global_categories import global_categories
 from app.models.category import Category
+from app.models.expense import Expense
 from app.models.user import User
 from app.schemas.category_schema import CategorySchema, CategoryQuerySchema
+from app.serializers import RowSerializer
+from app.query_budget import query_budget
 
 category_bp = Blueprint('categories', __name__, url_prefix='/api/categories', description='Operations on categories')
 
 @category_bp.route('/')
 class Categories(MethodView):
+    @query_budget(2)
     @jwt_required()
     @category_bp.arguments(CategoryQuerySchema, location='query')
     @category_bp.response(200, CategorySchema(many=True))
     def get(self, args):
         """Get all categories with optional filters."""
         current_user_id = get_jwt_identity()
-        
-        query = Category.query
-        
-        if 'name' in args:
-            query = query.filter(Category.name.ilike(f"%{args['name']}%"))
-        
-        if 'is_global' in args:
-            query = query.filter_by(is_global=args['is_global'])
-        
-        # Always filter categories accessible to the user
-        query = query.filter(
-            (Category.user_id == current_user_id) | 
-            (Category.is_global == True) |
-            (Category.user_id.is_(None) & Category.is_global == True)
-        )
-        
-        return query.order_by(Category.created_at.desc()).all()
+        serializer = RowSerializer(CategorySchema, Category, only=args.get('fieldset'))
+        categories = []
+        
+        # The user's own categories come from the database...
+        if not args.get('is_global'):
+            query = Category.query.filter_by(user_id=current_user_id, is_global=False)
+            if 'name' in args:
+                query = query.filter(Category.name.ilike(f"%{args['name']}%"))
+            categories += serializer.select(query).all()
+        
+        # ...and the global ones from memory
+        if args.get('is_global', True):
+            name = args.get('name', '').lower()
+            categories += serializer.rows_of(
+                category for category in global_categories() if name in category.name.lower()
+            )
+        
+        created_at = serializer.keys.index('created_at')
+        categories.sort(key=lambda row: row[created_at], reverse=True)
+        return serializer.response(categories)
     
     @jwt_required()
     @category_bp.arguments(CategorySchema)
@@ -67,8 +75,9 @@ class Categories(MethodView):
         if existing_category:
             abort(400, message="You already have a category with this name")
         
-        category = Category(**category_data)
+        category = Category(**category_data, expense_count=0)
         db.session.add(category)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         return category
 
@@ -104,7 +113,14 @@ class CategoryById(MethodView):
         # Don't allow changing global categories (only admins should do this)
         if category.is_global:
             abort(403, message="Cannot modify global categories")
-        
+
+        # Nor turning a personal category into a global one, or handing it
+        # to another user
+        if category_data.pop('is_global', False):
+            abort(403, message="Only administrators can create global categories")
+        if category_data.get('user_id', current_user_id) != current_user_id:
+            abort(403, message="You can only update your own categories")
+
         # Check if name is being changed and if it conflicts
         if 'name' in category_data and category_data['name'] != category.name:
             existing_category = Category.query.filter_by(
@@ -120,9 +136,11 @@ class CategoryById(MethodView):
             if hasattr(category, key):
                 setattr(category, key, value)
         
+        User.bump_data_version(current_user_id)
         db.session.commit()
         return category
     
+    @query_budget(5)
     @jwt_required()
     @category_bp.response(204)
     def delete(self, category_id):
@@ -139,19 +157,21 @@ class CategoryById(MethodView):
         if category.is_global:
             abort(403, message="Cannot delete global categories")
         
-        # Check if category has associated expenses
-        if category.expenses:
+        # Check if category has associated expenses with an indexed EXISTS probe
+        if db.session.query(Expense.query.filter_by(category_id=category_id).exists()).scalar():
             abort(400, message="Cannot delete category with associated expenses")
         
-        db.session.delete(category)
+        # Bulk delete, so the empty expense and rollup collections aren't loaded for the cascade
+        Category.query.filter_by(id=category_id).delete(synchronize_session=False)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         return '', 204
 
 @category_bp.route('/global')
 class GlobalCategories(MethodView):
+    @query_budget(1)
     @jwt_required()
     @category_bp.response(200, CategorySchema(many=True))
     def get(self):
         """Get all global categories."""
-        categories = Category.query.filter_by(is_global=True).order_by(Category.name).all()
-        return categories
\ No newline at end of file
+        return list(global_categories())
\ No newline at end of file
@@ -1,67 +1,213 @@
+import uuid
+from datetime import date, datetime, timedelta
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from marshmallow import ValidationError
+from sqlalchemy import func, inspect
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 from app import db
 from app.models.expense import Expense
 from app.models.user import User
 from app.models.category import Category
 from app.models.account import Account
-from app.schemas.expense_schema import ExpenseSchema, ExpenseQuerySchema
+from app.models.expense_rollup import ExpenseRollup
+from app.schemas.expense_schema import (
+    ExpenseSchema,
+    ExpenseQuerySchema,
+    ExpenseExportQuerySchema,
+    ExpenseTimeseriesQuerySchema,
+    ExpenseBatchSchema,
+    ExpenseBatchResultSchema
+)
+from app.pagination import keyset_page, next_page_headers
+from app.export import stream_export
+from app.money import from_minor_units
+from app.sql import DATE_BUCKETS
+from app.search import search_expenses, search_rank
+from app.serializers import RowSerializer
+from app.cache import versioned_response
+from app.idempotency import idempotent
+from app.query_budget import query_budget
+from app.usage_counters import count_expense, count_expenses
 
 expense_bp = Blueprint('expenses', __name__, url_prefix='/api/expenses', description='Operations on expenses')
 
+DEFAULT_PAGE_SIZE = 50
+MAX_TIMESERIES_BUCKETS = 3660
+
+def align_bucket(day, interval):
+    """Return the first day of the bucket containing `day`."""
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_bucket(day, interval):
+    """Return the first day of the bucket after the one starting on `day`."""
+    if interval == 'week':
+        return day + timedelta(days=7)
+    if interval == 'month':
+        return (day + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+def filter_expenses(query, args, current_user_id):
+    """Apply the expense list filters and ownership checks to a query."""
+    # Always filter by current user's expenses
+    query = query.filter_by(user_id=current_user_id)
+    
+    if 'category_id' in args:
+        category = Category.query.get(args['category_id'])
+        if not category:
+            abort(404, message="Category not found")
+        
+        # Check if user has access to this category
+        if not category.is_global and category.user_id != current_user_id:
+            abort(403, message="You don't have access to this category")
+        
+        query = query.filter_by(category_id=args['category_id'])
+    
+    if 'account_id' in args:
+        account = Account.query.get(args['account_id'])
+        if not account:
+            abort(404, message="Account not found")
+        
+        # Check if account belongs to user
+        if account.user_id != current_user_id:
+            abort(403, message="This account doesn't belong to you")
+        
+        query = query.filter_by(account_id=args['account_id'])
+    
+    if 'start_date' in args:
+        query = query.filter(Expense.created_at >= args['start_date'])
+    
+    if 'end_date' in args:
+        query = query.filter(Expense.created_at <= args['end_date'])
+    
+    # Add amount filters if needed
+    if 'min_amount' in args:
+        query = query.filter(Expense.amount >= args['min_amount'])
+    
+    if 'max_amount' in args:
+        query = query.filter(Expense.amount <= args['max_amount'])
+    
+    # Full-text search over descriptions
+    if 'q' in args:
+        query = search_expenses(query, args['q'])
+    
+    return query
+
+def cached_instance(model, item_id):
+    """Return the loaded instance from the session identity map, without SQL.
+
+    Expired instances (e.g. after a commit) are skipped, since reading
+    them would refresh each one with its own query.
+    """
+    if item_id is None:
+        return None
+    instance = db.session.identity_map.get(identity_key(model, item_id))
+    if instance is None or inspect(instance).expired_attributes:
+        return None
+    return instance
+
+def load_expense_references(user_id, category_id, account_id):
+    """Load the user, category and account an expense refers to in one query.
+
+    Returns (user, category, account) with None for missing rows. Rows
+    already in the session identity map are reused without a query.
+    """
+    references = (
+        cached_instance(User, user_id),
+        cached_instance(Category, category_id),
+        cached_instance(Account, account_id)
+    )
+    if all(references):
+        return references
+    
+    row = db.session.query(User, Category, Account) \
+        .select_from(User) \
+        .outerjoin(Category, Category.id == category_id) \
+        .outerjoin(Account, Account.id == account_id) \
+        .filter(User.id == user_id) \
+        .one_or_none()
+    return tuple(row) if row else (None, None, None)
+
+def load_expense_for_update(expense_id, category_id=None, account_id=None):
+    """Load an expense, its current account and any new references in one query.
+
+    Returns (expense, category, account) where category and account are
+    the rows named by `category_id` and `account_id` (None when not
+    requested or missing). Aborts with 404 when the expense is missing.
+    """
+    new_account = aliased(Account)
+    entities = [Expense, Account]
+    query = db.session.query(Expense).join(Account, Account.id == Expense.account_id)
+    
+    if category_id is not None:
+        entities.append(Category)
+        query = query.outerjoin(Category, Category.id == category_id)
+    
+    if account_id is not None:
+        entities.append(new_account)
+        query = query.outerjoin(new_account, new_account.id == account_id)
+    
+    row = query.with_entities(*entities).filter(Expense.id == expense_id).one_or_none()
+    if row is None:
+        abort(404, message="Expense not found")
+    
+    # Attach the joined current account so expense.account never lazy loads,
+    # even when the identity map copy was expired by an earlier commit
+    expense = row[0]
+    set_committed_value(expense, 'account', row[1])
+    category = row[2] if category_id is not None else None
+    account = row[-1] if account_id is not None else None
+    return expense, category, account
+
 @expense_bp.route('/')
 class Expenses(MethodView):
+    @query_budget(5)
     @jwt_required()
+    @versioned_response
     @expense_bp.arguments(ExpenseQuerySchema, location='query')
     @expense_bp.response(200, ExpenseSchema(many=True))
     def get(self, args):
         """Get all expenses with optional filters."""
         current_user_id = get_jwt_identity()
         
-        query = Expense.query
-        
-        # Always filter by current user's expenses
-        query = query.filter_by(user_id=current_user_id)
-        
-        if 'category_id' in args:
-            category = Category.query.get(args['category_id'])
-            if not category:
-                abort(404, message="Category not found")
-            
-            # Check if user has access to this category
-            if not category.is_global and category.user_id != current_user_id:
-                abort(403, message="You don't have access to this category")
-            
-            query = query.filter_by(category_id=args['category_id'])
-        
-        if 'account_id' in args:
-            account = Account.query.get(args['account_id'])
-            if not account:
-                abort(404, message="Account not found")
-            
-            # Check if account belongs to user
-            if account.user_id != current_user_id:
-                abort(403, message="This account doesn't belong to you")
-            
-            query = query.filter_by(account_id=args['account_id'])
-        
-        if 'start_date' in args:
-            query = query.filter(Expense.created_at >= args['start_date'])
-        
-        if 'end_date' in args:
-            query = query.filter(Expense.created_at <= args['end_date'])
-        
-        # Add amount filters if needed
-        if 'min_amount' in args:
-            query = query.filter(Expense.amount >= args['min_amount'])
-        
-        if 'max_amount' in args:
-            query = query.filter(Expense.amount <= args['max_amount'])
-        
-        return query.order_by(Expense.created_at.desc()).all()
+        query = filter_expenses(Expense.query, args, current_user_id)
+        
+        # Fetch plain row tuples for only the serialized columns
+        serializer = RowSerializer(ExpenseSchema, Expense, only=args.get('fieldset'))
+        query = serializer.select(query)
+        
+        # Rank search results by relevance, then newest first
+        rank = search_rank(args['q']) if 'q' in args else None
+        
+        headers = {}
+        if 'limit' in args or 'cursor' in args:
+            # Keyset pagination when a page size or cursor is requested
+            expenses, next_cursor = keyset_page(
+                query,
+                Expense.created_at,
+                Expense.id,
+                limit=args.get('limit', DEFAULT_PAGE_SIZE),
+                cursor=args.get('cursor'),
+                rank=rank
+            )
+            headers = next_page_headers(next_cursor)
+        elif rank is not None:
+            expenses = query.order_by(rank.desc(), Expense.created_at.desc()).all()
+        else:
+            expenses = query.order_by(Expense.created_at.desc()).all()
+        
+        return serializer.response(expenses, headers)
     
+    @query_budget(14)
     @jwt_required()
+    @idempotent
     @expense_bp.arguments(ExpenseSchema)
     @expense_bp.response(201, ExpenseSchema)
     def post(self, expense_data):
@@ -72,18 +218,18 @@ class Expenses(MethodView):
         if expense_data['user_id'] != current_user_id:
             abort(403, message="You can only create expenses for yourself")
         
-        # Validate user exists
-        user = User.query.get(expense_data['user_id'])
+        # Validate that the user, category and account exist in one query
+        user, category, account = load_expense_references(
+            expense_data['user_id'],
+            expense_data['category_id'],
+            expense_data['account_id']
+        )
         if not user:
             abort(404, message="User not found")
         
-        # Validate category exists
-        category = Category.query.get(expense_data['category_id'])
         if not category:
             abort(404, message="Category not found")
         
-        # Validate account exists
-        account = Account.query.get(expense_data['account_id'])
         if not account:
             abort(404, message="Account not found")
         
@@ -104,12 +250,139 @@ class Expenses(MethodView):
         # Create expense
         expense = Expense(**expense_data)
         db.session.add(expense)
+        db.session.flush()
+        
+        ExpenseRollup.record_expense(expense)
+        count_expense(expense)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         
         return expense
 
+@expense_bp.route('/export')
+class ExpenseExport(MethodView):
+    @jwt_required()
+    @expense_bp.arguments(ExpenseExportQuerySchema, location='query')
+    def get(self, args):
+        """Stream all matching expenses as NDJSON or CSV."""
+        current_user_id = get_jwt_identity()
+        
+        query = filter_expenses(Expense.query, args, current_user_id)
+        query = query.order_by(Expense.created_at.desc(), Expense.id.desc())
+        
+        return stream_export(query, ExpenseSchema(), args['format'], 'expenses')
+
+@expense_bp.route('/batch')
+class ExpenseBatch(MethodView):
+    @query_budget(11)
+    @jwt_required()
+    @expense_bp.arguments(ExpenseBatchSchema)
+    @expense_bp.response(200, ExpenseBatchResultSchema)
+    def post(self, batch_data):
+        """Create many expenses in a single transaction."""
+        current_user_id = get_jwt_identity()
+        
+        results = []
+        accepted = []
+        
+        # Validate every item on its own so one bad item doesn't sink the batch
+        item_schema = ExpenseSchema()
+        for index, item in enumerate(batch_data['expenses']):
+            try:
+                expense_data = item_schema.load(item)
+            except ValidationError as e:
+                results.append({"index": index, "status": 422, "message": "Invalid input data", "errors": e.messages})
+                continue
+            
+            if expense_data['user_id'] != current_user_id:
+                results.append({"index": index, "status": 403, "message": "You can only create expenses for yourself"})
+                continue
+            
+            results.append(None)
+            accepted.append((index, expense_data))
+        
+        # Resolve all referenced categories and accounts with one query each
+        category_ids = {expense_data['category_id'] for _, expense_data in accepted}
+        account_ids = {expense_data['account_id'] for _, expense_data in accepted}
+        categories = {
+            category.id: category
+            for category in Category.query.filter(Category.id.in_(category_ids))
+        } if category_ids else {}
+        accounts = {
+            account.id: account
+            for account in Account.query.filter(Account.id.in_(account_ids)).with_for_update()
+        } if account_ids else {}
+        
+        # Track the remaining balance per account as items are accepted
+        available = {account_id: account.balance for account_id, account in accounts.items()}
+        rows = []
+        
+        for index, expense_data in accepted:
+            category = categories.get(expense_data['category_id'])
+            account = accounts.get(expense_data['account_id'])
+            
+            if not category:
+                results[index] = {"index": index, "status": 404, "message": "Category not found"}
+            elif not account:
+                results[index] = {"index": index, "status": 404, "message": "Account not found"}
+            elif not category.is_global and category.user_id != current_user_id:
+                results[index] = {"index": index, "status": 403, "message": "You don't have access to this category"}
+            elif account.user_id != current_user_id:
+                results[index] = {"index": index, "status": 403, "message": "This account doesn't belong to you"}
+            elif available[account.id] < expense_data['amount']:
+                results[index] = {"index": index, "status": 400, "message": "Insufficient funds"}
+            else:
+                available[account.id] -= expense_data['amount']
+                expense_id = str(uuid.uuid4())
+                rows.append({
+                    "id": expense_id,
+                    "description": None,
+                    "created_at": datetime.utcnow(),
+                    **expense_data
+                })
+                results[index] = {"index": index, "status": 201, "id": expense_id}
+        
+        if rows:
+            # Apply the net withdrawal once per account
+            for account_id, balance in available.items():
+                withdrawal = accounts[account_id].balance - balance
+                if withdrawal > 0:
+                    try:
+                        accounts[account_id].withdraw(withdrawal)
+                    except ValueError:
+                        db.session.rollback()
+                        abort(409, message="Account balance changed during the batch, please retry")
+            
+            db.session.execute(Expense.__table__.insert(), rows)
+            
+            # One rollup upsert for every (category, month) the batch touches
+            rollup_deltas = {}
+            for row in rows:
+                key = (row['category_id'], row['created_at'].replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+                total, count = rollup_deltas.get(key, (0, 0))
+                rollup_deltas[key] = (total + row['amount'], count + 1)
+            ExpenseRollup.record_many(current_user_id, rollup_deltas)
+            
+            category_counts = {}
+            account_counts = {}
+            for row in rows:
+                category_counts[row['category_id']] = category_counts.get(row['category_id'], 0) + 1
+                account_counts[row['account_id']] = account_counts.get(row['account_id'], 0) + 1
+            count_expenses(Category, category_counts)
+            count_expenses(Account, account_counts)
+            
+            User.bump_data_version(current_user_id)
+            db.session.commit()
+        
+        return {
+            "created": len(rows),
+            "failed": len(results) - len(rows),
+            "results": results
+        }
+
 @expense_bp.route('/<expense_id>')
 class ExpenseById(MethodView):
+    @query_budget(2)
     @jwt_required()
     @expense_bp.response(200, ExpenseSchema)
     def get(self, expense_id):
@@ -124,26 +397,35 @@ class ExpenseById(MethodView):
         
         return expense
     
+    @query_budget(11)
     @jwt_required()
     @expense_bp.response(204)
     def delete(self, expense_id):
         """Delete expense by ID."""
         current_user_id = get_jwt_identity()
         
-        expense = Expense.query.get_or_404(expense_id)
+        # Load the account with the expense for the refund
+        expense, _, _ = load_expense_for_update(expense_id)
         
         # Users can only delete their own expenses
         if expense.user_id != current_user_id:
             abort(403, message="You can only delete your own expenses")
         
         # Return money to account when deleting expense
-        account = expense.account
-        account.balance += expense.amount
+        try:
+            expense.account.deposit(expense.amount)
+        except ValueError as e:
+            db.session.rollback()
+            abort(400, message=str(e))
         
+        ExpenseRollup.record_expense(expense, sign=-1)
+        count_expense(expense, sign=-1)
         db.session.delete(expense)
+        User.bump_data_version(current_user_id)
         db.session.commit()
         return '', 204
     
+    @query_budget(13)
     @jwt_required()
     @expense_bp.arguments(ExpenseSchema(partial=True))
     @expense_bp.response(200, ExpenseSchema)
@@ -151,7 +433,12 @@ class ExpenseById(MethodView):
         """Update expense by ID."""
         current_user_id = get_jwt_identity()
         
-        expense = Expense.query.get_or_404(expense_id)
+        # Load the expense with every row the update may need in one query
+        expense, new_category, new_account = load_expense_for_update(
+            expense_id,
+            category_id=expense_data.get('category_id'),
+            account_id=expense_data.get('account_id')
+        )
         
         # Users can only update their own expenses
         if expense.user_id != current_user_id:
@@ -160,25 +447,23 @@ class ExpenseById(MethodView):
         # Store old amount for balance adjustment
         old_amount = expense.amount
         
-        # If amount is being updated, adjust account balance
+        # If amount is being updated, adjust account balance by the difference
         if 'amount' in expense_data and expense_data['amount'] != old_amount:
             account = expense.account
+            difference = expense_data['amount'] - old_amount
             
-            # First, return old amount to account
-            account.balance += old_amount
-            
-            # Then, check if new amount can be withdrawn
             try:
-                account.withdraw(expense_data['amount'])
+                if difference > 0:
+                    account.withdraw(difference)
+                else:
+                    account.deposit(-difference)
             except ValueError as e:
-                # If withdrawal fails, restore original balance
-                account.balance -= old_amount
                 db.session.rollback()
                 abort(400, message=str(e))
         
         # If category is being updated, validate new category
         if 'category_id' in expense_data and expense_data['category_id'] != expense.category_id:
-            category = Category.query.get(expense_data['category_id'])
+            category = new_category
             if not category:
                 abort(404, message="Category not found")
             
@@ -188,7 +473,7 @@ class ExpenseById(MethodView):
         
         # If account is being updated, validate new account
         if 'account_id' in expense_data and expense_data['account_id'] != expense.account_id:
-            account = Account.query.get(expense_data['account_id'])
+            account = new_account
             if not account:
                 abort(404, message="Account not found")
             
@@ -196,26 +481,100 @@ class ExpenseById(MethodView):
             if account.user_id != current_user_id:
                 abort(403, message="This account doesn't belong to you")
         
+        # Move the expense between rollup rows if anything they track changes
+        rollup_changed = any(
+            key in expense_data and expense_data[key] != getattr(expense, key)
+            for key in ('user_id', 'category_id', 'amount')
+        )
+        if rollup_changed:
+            ExpenseRollup.record_expense(expense, sign=-1)
+        
+        old_category_id = expense.category_id
+        old_account_id = expense.account_id
+        
         # Update expense fields
         for key, value in expense_data.items():
             if hasattr(expense, key):
                 setattr(expense, key, value)
         
+        if rollup_changed:
+            ExpenseRollup.record_expense(expense)
+        
+        # Move the expense between usage counters
+        if expense.category_id != old_category_id:
+            count_expenses(Category, {old_category_id: -1, expense.category_id: 1})
+        
+        if expense.account_id != old_account_id:
+            count_expenses(Account, {old_account_id: -1, expense.account_id: 1})
+        
+        User.bump_data_version(current_user_id)
         db.session.commit()
         return expense
 
+@expense_bp.route('/timeseries')
+class ExpenseTimeseries(MethodView):
+    @query_budget(4)
+    @jwt_required()
+    @expense_bp.arguments(ExpenseTimeseriesQuerySchema, location='query')
+    @expense_bp.response(200)
+    def get(self, args):
+        """Get expense totals bucketed by day, week or month."""
+        current_user_id = get_jwt_identity()
+        interval = args['interval']
+        
+        query = filter_expenses(Expense.query, args, current_user_id)
+        
+        bucket = DATE_BUCKETS[interval](Expense.created_at)
+        rows = query.with_entities(
+            bucket,
+            func.sum(Expense.amount),
+            func.count(Expense.id)
+        ).group_by(bucket).all()
+        
+        totals = {date.fromisoformat(day): (total, count) for day, total, count in rows}
+        
+        # Gap-fill the requested range, or the range that has data
+        first = align_bucket(args['start_date'].date(), interval) if 'start_date' in args else min(totals, default=None)
+        last = align_bucket(args['end_date'].date(), interval) if 'end_date' in args else max(totals, default=None)
+        
+        buckets = []
+        current = first
+        while first and last and current <= last:
+            if len(buckets) >= MAX_TIMESERIES_BUCKETS:
+                abort(400, message=f"Time range spans more than {MAX_TIMESERIES_BUCKETS} buckets")
+            buckets.append(current)
+            current = next_bucket(current, interval)
+        
+        return {
+            "interval": interval,
+            "timestamps": [day.isoformat() for day in buckets],
+            "totals": [from_minor_units(totals.get(day, (0, 0))[0]) for day in buckets],
+            "counts": [totals.get(day, (0, 0))[1] for day in buckets]
+        }
+
 @expense_bp.route('/summary')
 class ExpenseSummary(MethodView):
+    @query_budget(5)
     @jwt_required()
+    @versioned_response
     @expense_bp.response(200)
     def get(self):
         """Get expense summary for current user."""
         current_user_id = get_jwt_identity()
         
-        # Get all expenses for the user
-        expenses = Expense.query.filter_by(user_id=current_user_id).all()
+        # Read the maintained rollups instead of scanning raw expenses
+        rollups = ExpenseRollup.query.filter(
+            ExpenseRollup.user_id == current_user_id,
+            ExpenseRollup.expense_count > 0
+        )
         
-        if not expenses:
+        totals = rollups.with_entities(
+            func.coalesce(func.sum(ExpenseRollup.total), 0),
+            func.coalesce(func.sum(ExpenseRollup.expense_count), 0)
+        ).one()
+        total_expenses, expense_count = totals
+        
+        if not expense_count:
             return {
                 "total_expenses": 0,
                 "expense_count": 0,
@@ -224,42 +583,38 @@ class ExpenseSummary(MethodView):
                 "by_month": {}
             }
         
-        # Calculate totals
-        total_expenses = sum(expense.amount for expense in expenses)
-        expense_count = len(expenses)
-        average_expense = total_expenses / expense_count
+        average_expense = from_minor_units(total_expenses) / expense_count
         
         # Group by category
-        by_category = {}
-        for expense in expenses:
-            category = Category.query.get(expense.category_id)
-            category_name = category.name if category else "Unknown"
-            
-            if category_name not in by_category:
-                by_category[category_name] = {
-                    "total": 0,
-                    "count": 0
-                }
-            
-            by_category[category_name]["total"] += expense.amount
-            by_category[category_name]["count"] += 1
+        category_name = func.coalesce(Category.name, 'Unknown')
+        category_rows = rollups.outerjoin(Category, Category.id == ExpenseRollup.category_id) \
+            .with_entities(
+                category_name,
+                func.sum(ExpenseRollup.total),
+                func.sum(ExpenseRollup.expense_count)
+            ) \
+            .group_by(category_name) \
+            .all()
+        
+        by_category = {
+            name: {"total": from_minor_units(total), "count": count}
+            for name, total, count in category_rows
+        }
         
         # Group by month
-        by_month = {}
-        for expense in expenses:
-            month_key = expense.created_at.strftime("%Y-%m") if expense.created_at else "Unknown"
-            
-            if month_key not in by_month:
-                by_month[month_key] = {
-                    "total": 0,
-                    "count": 0
-                }
-            
-            by_month[month_key]["total"] += expense.amount
-            by_month[month_key]["count"] += 1
+        month_rows = rollups.with_entities(
+            ExpenseRollup.month,
+            func.sum(ExpenseRollup.total),
+            func.sum(ExpenseRollup.expense_count)
+        ).group_by(ExpenseRollup.month).all()
+        
+        by_month = {
+            month: {"total": from_minor_units(total), "count": count}
+            for month, total, count in month_rows
+        }
         
         return {
-            "total_expenses": total_expenses,
+            "total_expenses": from_minor_units(total_expenses),
             "expense_count": expense_count,
             "average_expense": average_expense,
             "by_category": by_category,
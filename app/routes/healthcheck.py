@@ -42,6 +42,7 @@ def status():
     """Detailed status endpoint."""
     try:
         from app import db
+        from app.identity import identity_cache_stats
         from sqlalchemy import text
         
         # Check database connection
@@ -55,6 +56,7 @@ def status():
             "status": "operational",
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "database": db_status,
+            "identity_cache": identity_cache_stats(),
             "services": {
                 "api": "running",
                 "authentication": "enabled",
@@ -2,34 +2,54 @@ from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import fields, validate
+from sqlalchemy import func, select
 from app import db
 from app.models.user import User
+from app.passwords import PasswordHasherBusy
+from app.models.account import Account
+from app.models.category import Category
+from app.models.expense_rollup import ExpenseRollup
 from app.schemas.user_schema import UserSchema, UserQuerySchema
+from app.money import from_minor_units
+from app.pagination import keyset_page, next_page_headers
+from app.search import search_user_names, search_user_prefix
+from app.serializers import RowSerializer
+from app.cache import versioned_response
+from app.identity import load_identity, invalidate_identity
+from app.query_budget import query_budget
 
 user_bp = Blueprint('users', __name__, url_prefix='/api/users', description='Operations on users')
 
 @user_bp.route('/')
 class Users(MethodView):
+    @query_budget(2)
     @jwt_required()
     @user_bp.arguments(UserQuerySchema, location='query')
     @user_bp.response(200, UserSchema(many=True))
     def get(self, args):
-        """Get all users with optional filters."""
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        
+        """Get one page of users with optional filters, newest first."""
         # For security, you might want to restrict this to admins only
         # For now, allow all authenticated users
         query = User.query
         
         if 'name' in args:
-            query = query.filter(User.name.ilike(f"%{args['name']}%"))
+            query = search_user_names(query, args['name'])
         
-        if 'email' in args:
-            query = query.filter(User.email.ilike(f"%{args['email']}%"))
+        if 'prefix' in args:
+            query = search_user_prefix(query, args['prefix'])
         
-        users = query.order_by(User.created_at.desc()).all()
-        return users
+        if 'email' in args:
+            query = query.filter(func.lower(User.email) == args['email'].lower())
+        
+        serializer = RowSerializer(UserSchema, User)
+        users, next_cursor = keyset_page(
+            serializer.select(query),
+            User.created_at,
+            User.id,
+            limit=args['limit'],
+            cursor=args.get('cursor')
+        )
+        return serializer.response(users, next_page_headers(next_cursor))
 
 @user_bp.route('/<user_id>')
 class UserById(MethodView):
@@ -43,7 +63,9 @@ class UserById(MethodView):
         if user_id != current_user_id:
             abort(403, message="You can only view your own profile")
         
-        user = User.query.get_or_404(user_id)
+        user = load_identity(user_id)
+        if user is None:
+            abort(404, message="User not found")
         return user
     
     @jwt_required()
@@ -82,8 +104,12 @@ class UserById(MethodView):
                 user.set_password(user_data['password'])
             
             db.session.commit()
+            invalidate_identity(user_id)
             return user
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             abort(500, message=f"Failed to update user: {str(e)}")
@@ -102,6 +128,7 @@ class UserById(MethodView):
             user = User.query.get_or_404(user_id)
             db.session.delete(user)
             db.session.commit()
+            invalidate_identity(user_id)
             return '', 204
             
         except Exception as e:
@@ -110,7 +137,9 @@ class UserById(MethodView):
 
 @user_bp.route('/<user_id>/stats')
 class UserStats(MethodView):
+    @query_budget(3)
     @jwt_required()
+    @versioned_response
     @user_bp.response(200)
     def get(self, user_id):
         """Get user statistics."""
@@ -120,25 +149,22 @@ class UserStats(MethodView):
         if user_id != current_user_id:
             abort(403, message="You can only view your own statistics")
         
-        user = User.query.get_or_404(user_id)
-        
-        # Calculate total expenses
-        total_expenses = 0
-        for expense in user.expenses:
-            total_expenses += expense.amount
-        
-        # Calculate account balance
-        account_balance = 0
-        if user.accounts:
-            account_balance = user.accounts[0].balance
+        # Every figure is a scalar subquery of a single statement; expense
+        # totals come from the maintained rollups, not the raw expenses
+        def scalar(column, model):
+            return select(func.coalesce(column, 0)).where(model.user_id == user_id).scalar_subquery()
         
-        # Count categories
-        user_categories_count = Category.query.filter_by(user_id=user_id).count()
+        stats = db.session.execute(select(
+            scalar(func.sum(ExpenseRollup.total), ExpenseRollup).label('total_expenses'),
+            scalar(func.sum(ExpenseRollup.expense_count), ExpenseRollup).label('expense_count'),
+            scalar(func.sum(Account.balance), Account).label('account_balance'),
+            scalar(func.count(Category.id), Category).label('category_count')
+        )).one()
         
         return {
             "user_id": user_id,
-            "total_expenses": total_expenses,
-            "account_balance": account_balance,
-            "user_categories_count": user_categories_count,
-            "total_expenses_count": len(user.expenses)
-        }
\ No newline at end of file
+            "total_expenses": from_minor_units(stats.total_expenses),
+            "account_balance": from_minor_units(stats.account_balance),
+            "user_categories_count": stats.category_count,
+            "total_expenses_count": int(stats.expense_count)
+        }
@@ -1,13 +1,21 @@
 from app.schemas.user_schema import UserSchema, UserQuerySchema
 from app.schemas.category_schema import CategorySchema, CategoryQuerySchema
-from app.schemas.account_schema import AccountSchema, AccountQuerySchema, IncomeSchema, IncomeQuerySchema
-from app.schemas.expense_schema import ExpenseSchema, ExpenseQuerySchema
+from app.schemas.account_schema import (
+    AccountSchema, AccountQuerySchema, IncomeSchema, IncomeQuerySchema, IncomeExportQuerySchema,
+    AccountBalanceQuerySchema, StatementQuerySchema, StatementEntrySchema
+)
+from app.schemas.expense_schema import (
+    ExpenseSchema, ExpenseQuerySchema, ExpenseExportQuerySchema, ExpenseTimeseriesQuerySchema,
+    ExpenseBatchSchema, ExpenseBatchResultSchema
+)
 from app.schemas.error_schema import ErrorSchema
 
 __all__ = [
     'UserSchema', 'UserQuerySchema',
     'CategorySchema', 'CategoryQuerySchema',
-    'AccountSchema', 'AccountQuerySchema', 'IncomeSchema', 'IncomeQuerySchema',
-    'ExpenseSchema', 'ExpenseQuerySchema',
+    'AccountSchema', 'AccountQuerySchema', 'IncomeSchema', 'IncomeQuerySchema', 'IncomeExportQuerySchema',
+    'AccountBalanceQuerySchema', 'StatementQuerySchema', 'StatementEntrySchema',
+    'ExpenseSchema', 'ExpenseQuerySchema', 'ExpenseExportQuerySchema', 'ExpenseTimeseriesQuerySchema',
+    'ExpenseBatchSchema', 'ExpenseBatchResultSchema',
     'ErrorSchema'
 ]
\ No newline at end of file
@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from app.schemas.fields import Money, Fieldset, amount_range
 
 class AccountSchema(Schema):
     """Schema for account validation."""
@@ -7,12 +8,14 @@ class AccountSchema(Schema):
     
     id = fields.Str(dump_only=True)
     user_id = fields.Str(required=True)
-    balance = fields.Float(dump_only=True)
+    balance = Money(dump_only=True)
+    expense_count = fields.Int(dump_only=True)
     # Видалено: created_at та updated_at
 
 class AccountQuerySchema(Schema):
     """Schema for account query parameters."""
     user_id = fields.Str()
+    fieldset = Fieldset(AccountSchema)
 
 class IncomeSchema(Schema):
     """Schema for income validation."""
@@ -21,11 +24,37 @@ class IncomeSchema(Schema):
     
     id = fields.Str(dump_only=True)
     account_id = fields.Str(dump_only=True)
-    amount = fields.Float(required=True, validate=validate.Range(min=0.01))
+    amount = Money(required=True, validate=amount_range(min=1))
     description = fields.Str(validate=validate.Length(max=200))
     # Видалено: created_at
 
 class IncomeQuerySchema(Schema):
     """Schema for income query parameters."""
     start_date = fields.DateTime()
-    end_date = fields.DateTime()
\ No newline at end of file
+    end_date = fields.DateTime()
+    fieldset = Fieldset(IncomeSchema)
+
+class IncomeExportQuerySchema(IncomeQuerySchema):
+    """Schema for income export query parameters."""
+    class Meta:
+        exclude = ('fieldset',)
+    
+    format = fields.Str(load_default='ndjson', validate=validate.OneOf(['ndjson', 'csv']))
+
+class AccountBalanceQuerySchema(Schema):
+    """Schema for account balance query parameters."""
+    at = fields.DateTime()
+
+class StatementQuerySchema(Schema):
+    """Schema for account statement query parameters."""
+    limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=500))
+    cursor = fields.Str()
+
+class StatementEntrySchema(Schema):
+    """Schema for one account statement entry."""
+    type = fields.Str()
+    id = fields.Str()
+    amount = Money()  # negative for expenses
+    description = fields.Str(allow_none=True)
+    created_at = fields.DateTime()
+    balance = Money()  # balance right after this entry
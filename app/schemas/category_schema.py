@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from app.schemas.fields import Fieldset
 
 class CategorySchema(Schema):
     """Schema for category validation."""
@@ -9,9 +10,11 @@ class CategorySchema(Schema):
     name = fields.Str(required=True, validate=validate.Length(min=1, max=50))
     is_global = fields.Boolean(load_default=True)
     user_id = fields.Str(allow_none=True)
+    expense_count = fields.Int(dump_only=True, allow_none=True)  # None for global categories
 
 class CategoryQuerySchema(Schema):
     """Schema for category query parameters."""
     name = fields.Str(validate=validate.Length(max=50))
     is_global = fields.Boolean()
-    user_id = fields.Str()
\ No newline at end of file
+    user_id = fields.Str()
+    fieldset = Fieldset(CategorySchema)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from app.schemas.fields import Money, Fieldset, amount_range
 
 class ExpenseSchema(Schema):
     """Schema for expense validation."""
@@ -9,7 +10,7 @@ class ExpenseSchema(Schema):
     user_id = fields.Str(required=True)
     category_id = fields.Str(required=True)
     account_id = fields.Str(required=True)
-    amount = fields.Float(required=True, validate=validate.Range(min=0.01))
+    amount = Money(required=True, validate=amount_range(min=1))
     description = fields.Str(validate=validate.Length(max=200))
     # Видалено: created_at
 
@@ -19,4 +20,53 @@ class ExpenseQuerySchema(Schema):
     category_id = fields.Str()
     account_id = fields.Str()
     start_date = fields.DateTime()
-    end_date = fields.DateTime()
\ No newline at end of file
+    end_date = fields.DateTime()
+    min_amount = Money(validate=amount_range(min=0))
+    max_amount = Money(validate=amount_range(min=0))
+    q = fields.Str(validate=validate.Length(min=1, max=200))
+    fieldset = Fieldset(ExpenseSchema)
+    limit = fields.Int(validate=validate.Range(min=1, max=500))
+    cursor = fields.Str()
+
+class ExpenseExportQuerySchema(ExpenseQuerySchema):
+    """Schema for expense export query parameters."""
+    class Meta:
+        exclude = ('limit', 'cursor', 'fieldset')
+    
+    format = fields.Str(load_default='ndjson', validate=validate.OneOf(['ndjson', 'csv']))
+
+class ExpenseTimeseriesQuerySchema(ExpenseQuerySchema):
+    """Schema for expense time series query parameters."""
+    class Meta:
+        exclude = ('limit', 'cursor', 'fieldset')
+    
+    interval = fields.Str(load_default='day', validate=validate.OneOf(['day', 'week', 'month']))
+
+class ExpenseBatchSchema(Schema):
+    """Schema for bulk expense creation.
+
+    Items are validated one by one against ExpenseSchema so a single bad
+    item is reported in the results instead of rejecting the batch.
+    """
+    class Meta:
+        unknown = 'exclude'
+    
+    expenses = fields.List(
+        fields.Dict(),
+        required=True,
+        validate=validate.Length(min=1, max=10000)
+    )
+
+class ExpenseBatchItemResultSchema(Schema):
+    """Schema for the outcome of a single batch item."""
+    index = fields.Int()
+    status = fields.Int()
+    id = fields.Str()
+    message = fields.Str()
+    errors = fields.Dict()
+
+class ExpenseBatchResultSchema(Schema):
+    """Schema for bulk expense creation results."""
+    created = fields.Int()
+    failed = fields.Int()
+    results = fields.List(fields.Nested(ExpenseBatchItemResultSchema))
@@ -0,0 +1,40 @@
+from decimal import InvalidOperation
+from marshmallow import fields, validate
+from webargs.fields import DelimitedList
+from app.money import MAX_AMOUNT, to_minor_units, from_minor_units
+
+class Money(fields.Field):
+    """Decimal amount in the API, integer minor units (cents) in the application."""
+    default_error_messages = {
+        'invalid': 'Not a valid amount.'
+    }
+    
+    def _serialize(self, value, attr, obj, **kwargs):
+        return from_minor_units(value)
+    
+    def _deserialize(self, value, attr, data, **kwargs):
+        if isinstance(value, bool):
+            raise self.make_error('invalid')
+        try:
+            return to_minor_units(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise self.make_error('invalid')
+
+def amount_range(min):
+    """Range of accepted amounts in minor units, capped at MAX_AMOUNT."""
+    return [
+        validate.Range(min=min, error='Must be at least 0.01.' if min else None),
+        validate.Range(max=MAX_AMOUNT, error=f'Must be at most {from_minor_units(MAX_AMOUNT):.2f}.')
+    ]
+
+def Fieldset(schema_class):
+    """Query parameter listing a comma-separated subset of a schema's fields."""
+    names = [
+        name for name, field in schema_class().fields.items()
+        if not field.load_only
+    ]
+    return DelimitedList(
+        fields.Str(validate=validate.OneOf(names)),
+        data_key='fields',
+        validate=validate.Length(min=1)
+    )
@@ -31,8 +31,11 @@ class UserSchema(Schema):
 
 class UserQuerySchema(Schema):
     """Schema for user query parameters."""
-    name = fields.Str(validate=validate.Length(max=100))
-    email = fields.Email()
+    name = fields.Str(validate=validate.Length(min=1, max=100))  # substring, case-insensitive
+    prefix = fields.Str(validate=validate.Length(min=1, max=100))  # name prefix, case-insensitive
+    email = fields.Email()  # exact, case-insensitive
+    limit = fields.Int(load_default=50, validate=validate.Range(min=1, max=500))
+    cursor = fields.Str()
 
 class LoginSchema(Schema):
     """Schema for user login."""
@@ -0,0 +1,111 @@
+"""Full-text search over expense descriptions and user directory name search."""
+import re
+import sys
+
+from sqlalchemy import Float, cast, column, false, func, literal_column, select, table, text
+
+from app import db
+from app.models.expense import description_tsvector
+from app.models.user import User
+
+# FTS5 shadow tables maintained by triggers on SQLite
+expenses_fts = table('expenses_fts', column('rowid'))
+users_fts = table('users_fts', column('rowid'), column('name_lower'))
+
+
+def search_terms(q):
+    """Split a free-text query into plain word terms."""
+    return re.findall(r'\w+', q)
+
+
+def _is_postgresql():
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def search_expenses(query, q):
+    """Restrict an expense query to descriptions matching every term of `q`."""
+    terms = search_terms(q)
+    if not terms:
+        return query.filter(false())
+
+    if _is_postgresql():
+        ts_query = func.plainto_tsquery('simple', ' '.join(terms))
+        return query.filter(description_tsvector.op('@@')(ts_query))
+
+    # Quote every term so FTS5 query syntax in user input is taken literally
+    match = ' '.join('"%s"' % term for term in terms)
+    return query.join(expenses_fts, expenses_fts.c.rowid == literal_column('expenses.rowid')) \
+        .filter(text('expenses_fts MATCH :search_match').bindparams(search_match=match))
+
+
+def search_rank(q):
+    """Relevance of a row matched by search_expenses; higher ranks better.
+
+    Returns None when `q` has no searchable terms (nothing matches then).
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+
+    if _is_postgresql():
+        ts_query = func.plainto_tsquery('simple', ' '.join(terms))
+        # ts_rank is float4; widen it so the value written into the cursor
+        # compares equal to the column when the next page is read
+        return cast(func.ts_rank(description_tsvector, ts_query), Float(53)).label('rank')
+
+    return (-func.bm25(literal_column('expenses_fts'))).label('rank')
+
+
+def search_user_names(query, name):
+    """Restrict a user query to names containing `name`, ignoring case.
+
+    PostgreSQL serves the match from the pg_trgm index on lower(name);
+    SQLite from the FTS5 trigram table. Either way terms shorter than
+    three characters fall back to scanning, as no trigram covers them.
+    """
+    if _is_postgresql():
+        return query.filter(func.lower(User.name).contains(name.lower(), autoescape=True))
+
+    # Collect matching rowids from the trigram index first, so the planner
+    # doesn't walk the whole directory probing the shadow table per row.
+    # The table holds lower(name), as LIKE only folds ASCII case. The
+    # tokenizer only answers LIKE from its index without an ESCAPE
+    # clause, so wildcards in `name` widen the match and are then taken
+    # literally by a second filter.
+    matches = select(users_fts.c.rowid).where(users_fts.c.name_lower.like(f'%{name.lower()}%'))
+    query = query.filter(literal_column('users.rowid').in_(matches))
+    if '%' in name or '_' in name:
+        query = query.filter(func.instr(func.lower(User.name), name.lower()) > 0)
+    return query
+
+
+def search_user_prefix(query, prefix):
+    """Restrict a user query to names starting with `prefix`, ignoring case.
+
+    Both dialects use the B-tree on lower(name): PostgreSQL through its
+    text_pattern_ops LIKE support, SQLite through an equivalent range.
+    """
+    name_lower = func.lower(User.name)
+    prefix = prefix.lower()
+    if _is_postgresql():
+        return query.filter(name_lower.startswith(prefix, autoescape=True))
+
+    query = query.filter(name_lower >= prefix)
+    upper_bound = _prefix_upper_bound(prefix)
+    if upper_bound is not None:
+        query = query.filter(name_lower < upper_bound)
+    return query
+
+
+def _prefix_upper_bound(prefix):
+    """Smallest string after every string starting with `prefix`, or None if there is none."""
+    # Trailing U+10FFFF can't be incremented; the bound moves to the character before
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+
+    code = ord(stripped[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates can't be stored as UTF-8; the next character is U+E000
+        code = 0xE000
+    return stripped[:-1] + chr(code)
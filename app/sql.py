@@ -0,0 +1,103 @@
+"""Dialect-aware SQL helpers shared by the aggregate queries."""
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import String
+
+
+class month_key(FunctionElement):
+    """Render a timestamp column as a 'YYYY-MM' string."""
+    type = String()
+    name = 'month_key'
+    inherit_cache = True
+
+
+@compiles(month_key)
+def _month_key_default(element, compiler, **kw):
+    return "to_char(%s, 'YYYY-MM')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_key, 'sqlite')
+def _month_key_sqlite(element, compiler, **kw):
+    return "strftime('%%Y-%%m', %s)" % compiler.process(element.clauses, **kw)
+
+
+class day_bucket(FunctionElement):
+    """Render a timestamp column as the 'YYYY-MM-DD' date it falls on."""
+    type = String()
+    name = 'day_bucket'
+    inherit_cache = True
+
+
+class week_bucket(FunctionElement):
+    """Render a timestamp column as the 'YYYY-MM-DD' Monday of its ISO week."""
+    type = String()
+    name = 'week_bucket'
+    inherit_cache = True
+
+
+class month_bucket(FunctionElement):
+    """Render a timestamp column as the 'YYYY-MM-DD' first day of its month."""
+    type = String()
+    name = 'month_bucket'
+    inherit_cache = True
+
+
+@compiles(day_bucket)
+def _day_bucket_default(element, compiler, **kw):
+    return "to_char(date_trunc('day', %s), 'YYYY-MM-DD')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_bucket, 'sqlite')
+def _day_bucket_sqlite(element, compiler, **kw):
+    return "date(%s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_bucket)
+def _week_bucket_default(element, compiler, **kw):
+    return "to_char(date_trunc('week', %s), 'YYYY-MM-DD')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(week_bucket, 'sqlite')
+def _week_bucket_sqlite(element, compiler, **kw):
+    return "date(%s, 'weekday 0', '-6 days')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_bucket)
+def _month_bucket_default(element, compiler, **kw):
+    return "to_char(date_trunc('month', %s), 'YYYY-MM-DD')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(month_bucket, 'sqlite')
+def _month_bucket_sqlite(element, compiler, **kw):
+    return "strftime('%%Y-%%m-01', %s)" % compiler.process(element.clauses, **kw)
+
+
+DATE_BUCKETS = {
+    'day': day_bucket,
+    'week': week_bucket,
+    'month': month_bucket,
+}
+
+
+
+def _unicode_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        # SQLite's lower() only folds ASCII; match Python's str.lower() so
+        # lower(name) lookups agree with the lowercased search input.
+        # Deterministic, so it can still back the lower() expression indexes.
+        dbapi_connection.create_function('lower', 1, _unicode_lower, deterministic=True)
+
+
+def init_sqlite_functions(app):
+    """Replace SQLite's ASCII-only lower() on every connection of `app`'s engine."""
+    from app import db
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', _register_sqlite_functions)
@@ -0,0 +1,59 @@
+"""Account statements: incomes and expenses merged into one keyset-paged list."""
+from sqlalchemy import literal, select, tuple_, union_all
+
+from app import db
+from app.models.expense import Expense
+from app.models.income import Income
+from app.pagination import decode_cursor, encode_cursor
+
+
+def _branch(model, kind, amount, account_id, position, limit):
+    """Newest `limit` rows of one transaction table after `position`."""
+    query = select(
+        literal(kind).label('type'),
+        model.id.label('id'),
+        amount.label('amount'),
+        model.description.label('description'),
+        model.created_at.label('created_at')
+    ).where(model.account_id == account_id)
+
+    if position is not None:
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(*position))
+
+    # Ordering and limiting each side lets both walk their
+    # (account_id, created_at) index instead of the full history
+    query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+    return select(query.subquery())
+
+
+def statement_page(account, limit, cursor=None):
+    """Return one page of an account statement, newest first, and the next cursor.
+
+    Each entry carries the account balance right after it. The first page
+    starts from the stored balance; later pages continue from the running
+    balance carried in the cursor, so no page re-sums older history.
+    """
+    balance, position = account.balance, None
+    if cursor:
+        created_at, item_id, _, balance = decode_cursor(cursor, carried=True)
+        position = (created_at, item_id)
+
+    merged = union_all(
+        _branch(Income, 'income', Income.amount, account.id, position, limit + 1),
+        _branch(Expense, 'expense', -Expense.amount, account.id, position, limit + 1)
+    ).subquery('statement')
+    rows = db.session.execute(
+        select(merged).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1)
+    ).all()
+
+    entries = []
+    for row in rows[:limit]:
+        entries.append({**row._asdict(), 'balance': balance})
+        balance -= row.amount
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_at, last.id, carry=balance)
+
+    return entries, next_cursor
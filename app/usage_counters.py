@@ -0,0 +1,96 @@
+"""Denormalized expense counts on categories and accounts.
+
+Category.expense_count and Account.expense_count are kept in step with
+the expenses table on every expense write, so usage displays read one
+column instead of counting rows. Global categories are shared by every
+user's expenses, so their counter is left NULL rather than turning one
+row into a write hotspot for all users; per-user usage of them comes
+from the expense rollups.
+"""
+from sqlalchemy import case, func, select
+
+from app import db
+
+
+def _tracked(model):
+    """Table of `model` and the filter selecting rows whose counter is maintained."""
+    from app.models.category import Category
+
+    table = model.__table__
+    condition = table.c.is_global.is_(False) if model is Category else None
+    return table, condition
+
+
+def count_expenses(model, deltas):
+    """Add expense count deltas, keyed by row id, to `model`'s counters.
+
+    All rows are changed by one relative UPDATE, so concurrent writers
+    never lose an increment and a batch costs one statement however many
+    rows it touches. Zero deltas are skipped.
+    """
+    deltas = {row_id: delta for row_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    table, condition = _tracked(model)
+    statement = table.update().where(table.c.id.in_(deltas))
+    if condition is not None:
+        statement = statement.where(condition)
+    delta = case(deltas, value=table.c.id, else_=0)
+    db.session.execute(statement.values(expense_count=table.c.expense_count + delta))
+
+
+def count_expense(expense, sign=1):
+    """Count (sign=1) or uncount (sign=-1) an expense on its category and account."""
+    from app.models.category import Category
+    from app.models.account import Account
+
+    count_expenses(Category, {expense.category_id: sign})
+    count_expenses(Account, {expense.account_id: sign})
+
+
+def _raw_count(model):
+    from app.models.category import Category
+    from app.models.expense import Expense
+
+    table = model.__table__
+    foreign_key = Expense.category_id if model is Category else Expense.account_id
+    return select(func.count(Expense.id)).where(foreign_key == table.c.id).scalar_subquery()
+
+
+def _counted_models():
+    from app.models.category import Category
+    from app.models.account import Account
+
+    return Category, Account
+
+
+def rebuild():
+    """Recompute every counter from the raw expenses table."""
+    for model in _counted_models():
+        table, condition = _tracked(model)
+        statement = table.update().values(expense_count=_raw_count(model))
+        if condition is not None:
+            statement = statement.where(condition)
+            db.session.execute(table.update().where(~condition).values(expense_count=None))
+        db.session.execute(statement)
+    db.session.commit()
+
+
+def mismatches():
+    """Compare the counters with the raw expenses table.
+
+    Returns a list of (table, id, expected, actual) tuples.
+    """
+    problems = []
+    for model in _counted_models():
+        table, condition = _tracked(model)
+        expected = _raw_count(model)
+        query = select(table.c.id, expected, table.c.expense_count).where(
+            func.coalesce(table.c.expense_count, -1) != expected
+        )
+        if condition is not None:
+            query = query.where(condition)
+        for row_id, want, got in db.session.execute(query):
+            problems.append((table.name, row_id, want, got))
+    return problems
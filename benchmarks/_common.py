@@ -0,0 +1,120 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against an in-memory SQLite database by default. Set
+BENCH_DATABASE_URL to point them at PostgreSQL instead.
+"""
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from config import config, TestingConfig
+
+
+class BenchmarkConfig(TestingConfig):
+    """Testing configuration pointed at the benchmark database."""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL', 'sqlite:///:memory:')
+
+
+config['benchmark'] = BenchmarkConfig
+
+
+def create_bench_app():
+    """Create an app with a fresh schema for benchmarking."""
+    from app import create_app, db
+
+    app = create_app('benchmark')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def register_user(client, name='Bench User', email='bench@example.com', password='secret123'):
+    """Register and log in a user, returning ids and auth headers."""
+    client.post('/api/auth/register', json={
+        'name': name,
+        'email': email,
+        'password': password,
+        'confirm_password': password
+    })
+    login = client.post('/api/auth/login', json={'email': email, 'password': password}).get_json()
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+
+    account_id = client.get('/api/accounts/', headers=headers).get_json()[0]['id']
+    categories = client.get('/api/categories/global', headers=headers).get_json()
+
+    return {
+        'user_id': login['user']['id'],
+        'account_id': account_id,
+        'category_ids': [category['id'] for category in categories],
+        'headers': headers
+    }
+
+
+def seed_expenses(user, count, offset=0):
+    """Bulk insert `count` expenses for a user spread over categories and days."""
+    from app import db
+    from app.models.expense import Expense
+    from app.models.expense_rollup import ExpenseRollup
+    from app.models.user import User
+
+    start = datetime(2024, 1, 1)
+    category_ids = user['category_ids']
+    rows = [
+        {
+            'id': str(uuid.uuid4()),
+            'user_id': user['user_id'],
+            'category_id': category_ids[i % len(category_ids)],
+            'account_id': user['account_id'],
+            'amount': (i % 100 + 1) * 100,
+            'description': f'Expense {i}',
+            'created_at': start + timedelta(minutes=i * 7)
+        }
+        for i in range(offset, offset + count)
+    ]
+    db.session.execute(Expense.__table__.insert(), rows)
+    User.bump_data_version(user['user_id'])
+    db.session.commit()
+    ExpenseRollup.rebuild()
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect executed SQL statements into the yielded list."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def timed(func, repeat=5):
+    """Return the best wall-clock time of `repeat` calls in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def print_table(headers, rows):
+    """Print rows as a simple aligned table."""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:>{width}}}' for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
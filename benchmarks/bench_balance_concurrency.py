@@ -0,0 +1,66 @@
+"""Stress concurrent expense and income posts against a single account.
+
+Checks that the final balance matches the accepted operations and reports
+throughput. Uses a temporary SQLite file unless BENCH_DATABASE_URL is set.
+
+Usage: python benchmarks/bench_balance_concurrency.py [threads] [operations]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault(
+    'BENCH_DATABASE_URL',
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_balance.db')
+)
+
+from _common import create_bench_app, register_user, print_table
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    app = create_bench_app()
+    client = app.test_client()
+
+    user = register_user(client)
+    headers = user['headers']
+    account_url = f"/api/accounts/{user['account_id']}"
+    client.post(f'{account_url}/income', json={'amount': float(operations)}, headers=headers)
+
+    expense = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids'][0],
+        'account_id': user['account_id'],
+        'amount': 1.0
+    }
+
+    def operation(i):
+        worker = app.test_client()
+        if i % 3 == 0:
+            return 'income', worker.post(f'{account_url}/income', json={'amount': 2.0}, headers=headers).status_code
+        return 'expense', worker.post('/api/expenses/', json=expense, headers=headers).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(operation, range(operations)))
+    elapsed = time.perf_counter() - started
+
+    incomes = sum(1 for kind, status in results if kind == 'income' and status == 201)
+    expenses = sum(1 for kind, status in results if kind == 'expense' and status == 201)
+    errors = sum(1 for _, status in results if status != 201)
+    expected = operations + incomes * 2.0 - expenses * 1.0
+    actual = client.get(f'{account_url}/balance', headers=headers).get_json()['balance']
+
+    print_table(
+        ('threads', 'operations', 'errors', 'expected', 'actual', 'ops/s'),
+        [(threads, operations, errors, expected, actual, f'{operations / elapsed:.0f}')]
+    )
+    if actual != expected:
+        sys.exit('Balance mismatch: updates were lost')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Compare POST /api/expenses/batch against one POST /api/expenses per item.
+
+Usage: python benchmarks/bench_expense_batch.py [items]
+"""
+import sys
+import time
+
+from _common import create_bench_app, register_user, count_queries, print_table
+
+from app import db
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        headers = user['headers']
+        client.post(f"/api/accounts/{user['account_id']}/income",
+                    json={'amount': float(items * 10)}, headers=headers)
+
+        payload = [
+            {
+                'user_id': user['user_id'],
+                'category_id': user['category_ids'][i % len(user['category_ids'])],
+                'account_id': user['account_id'],
+                'amount': 1.0,
+                'description': f'Synced {i}'
+            }
+            for i in range(items)
+        ]
+
+        with count_queries(db.engine) as single_statements:
+            started = time.perf_counter()
+            for item in payload:
+                client.post('/api/expenses/', json=item, headers=headers)
+            single_seconds = time.perf_counter() - started
+
+        with count_queries(db.engine) as batch_statements:
+            started = time.perf_counter()
+            client.post('/api/expenses/batch', json={'expenses': payload}, headers=headers)
+            batch_seconds = time.perf_counter() - started
+
+    print_table(
+        ('path', 'items', 'statements', 'seconds', 'items/s'),
+        [
+            ('single', items, len(single_statements), f'{single_seconds:.2f}', f'{items / single_seconds:.0f}'),
+            ('batch', items, len(batch_statements), f'{batch_seconds:.2f}', f'{items / batch_seconds:.0f}'),
+        ]
+    )
+
+
+if __name__ == '__main__':
+    main()
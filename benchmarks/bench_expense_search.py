@@ -0,0 +1,72 @@
+"""Benchmark description search (?q=) against a naive ILIKE '%q%' scan.
+
+Usage: python benchmarks/bench_expense_search.py [rows]
+"""
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from _common import create_bench_app, register_user, timed, print_table
+
+from app import db
+from app.models.expense import Expense
+
+WORDS = ['coffee', 'lunch', 'taxi', 'groceries', 'rent', 'cinema', 'books', 'gym', 'pharmacy', 'fuel']
+RARE_WORD = 'saxophone'
+
+
+def seed(user, rows):
+    random.seed(42)
+    start = datetime(2020, 1, 1)
+    batch = []
+    for i in range(rows):
+        words = random.sample(WORDS, 3)
+        if i % 1000 == 0:
+            words.append(RARE_WORD)
+        batch.append({
+            'id': str(uuid.uuid4()),
+            'user_id': user['user_id'],
+            'category_id': user['category_ids'][i % len(user['category_ids'])],
+            'account_id': user['account_id'],
+            'amount': 100,
+            'description': ' '.join(words),
+            'created_at': start + timedelta(minutes=i)
+        })
+        if len(batch) == 10000:
+            db.session.execute(Expense.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Expense.__table__.insert(), batch)
+    db.session.commit()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        seed(user, rows)
+
+        results = []
+        for term in (RARE_WORD, 'coffee'):
+            search = timed(lambda: client.get(f'/api/expenses/?q={term}&limit=50', headers=user['headers']))
+            naive = timed(lambda: Expense.query
+                          .filter(Expense.user_id == user['user_id'],
+                                  Expense.description.ilike(f'%{term}%'))
+                          .order_by(Expense.created_at.desc())
+                          .limit(50)
+                          .all())
+            naive_count = timed(lambda: Expense.query
+                                .filter(Expense.user_id == user['user_id'],
+                                        Expense.description.ilike(f'%{term}%'))
+                                .count(), repeat=3)
+            results.append((rows, term, f'{search:.1f}', f'{naive:.1f}', f'{naive_count:.1f}'))
+
+    print_table(('rows', 'term', 'q= ms (API)', 'ILIKE page ms', 'ILIKE count ms'), results)
+
+
+if __name__ == '__main__':
+    main()
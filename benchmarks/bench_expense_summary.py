@@ -0,0 +1,32 @@
+"""Benchmark GET /api/expenses/summary as expense volume grows.
+
+Usage: python benchmarks/bench_expense_summary.py
+"""
+from _common import create_bench_app, register_user, seed_expenses, count_queries, timed, print_table
+
+from app import db
+
+
+def main():
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        rows = []
+        seeded = 0
+        for volume in (100, 1000, 10000, 50000):
+            seed_expenses(user, volume - seeded, offset=seeded)
+            seeded = volume
+
+            with count_queries(db.engine) as statements:
+                client.get('/api/expenses/summary', headers=user['headers'])
+
+            elapsed = timed(lambda: client.get('/api/expenses/summary', headers=user['headers']))
+            rows.append((volume, len(statements), f'{elapsed:.1f}'))
+
+    print_table(('expenses', 'queries', 'best ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Measure authenticated request rates with and without the identity cache.
+
+Usage: python benchmarks/bench_identity_cache.py [requests]
+"""
+import sys
+import time
+
+from _common import create_bench_app, register_user, seed_expenses, count_queries, print_table
+
+from app import db
+from app.cache import LocalCache
+
+
+def rate(client, url, headers, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get(url, headers=headers)
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        seed_expenses(user, 100)
+        headers = user['headers']
+        urls = ('/api/auth/me', '/api/accounts/', '/api/expenses/?limit=20', '/api/expenses/summary')
+
+        rows = []
+        for url in urls:
+            results = {}
+            for label, cache in (('off', None), ('on', LocalCache(10000, 30))):
+                app.extensions['identity_cache'] = cache
+                client.get(url, headers=headers)
+                with count_queries(db.engine) as statements:
+                    client.get(url, headers=headers)
+                results[label] = (len(statements), rate(client, url, headers, requests))
+
+            (queries_off, rate_off), (queries_on, rate_on) = results['off'], results['on']
+            rows.append((url, queries_off, queries_on, f'{rate_off:.0f}', f'{rate_on:.0f}',
+                         f'{(rate_on / rate_off - 1) * 100:+.0f}%'))
+
+        stats = app.extensions['identity_cache'].stats()
+
+    print_table(('endpoint', 'queries off', 'queries on', 'req/s off', 'req/s on', 'gain'), rows)
+    print(f"identity cache: {stats['hits']} hits, {stats['misses']} misses")
+
+
+if __name__ == '__main__':
+    main()
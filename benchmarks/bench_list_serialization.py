@@ -0,0 +1,48 @@
+"""Benchmark serialization of large expense lists.
+
+Compares the ORM entities + marshmallow + stdlib json path with the
+row-tuple RowSerializer + FastJSONProvider path used by the list routes.
+
+Usage: python benchmarks/bench_list_serialization.py
+"""
+import json
+
+from _common import create_bench_app, register_user, seed_expenses, timed, print_table
+
+from app.models.expense import Expense
+from app.schemas.expense_schema import ExpenseSchema
+from app.serializers import RowSerializer
+
+
+def main():
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        query = Expense.query.filter_by(user_id=user['user_id']).order_by(Expense.created_at.desc())
+        serializer = RowSerializer(ExpenseSchema, Expense)
+
+        def entity_path():
+            return json.dumps(ExpenseSchema(many=True).dump(query.all()), sort_keys=True)
+
+        def row_path():
+            return app.json.dumps(serializer.dump(serializer.select(query).all()))
+
+        rows = []
+        seeded = 0
+        for volume in (1000, 10000, 100000):
+            seed_expenses(user, volume - seeded, offset=seeded)
+            seeded = volume
+
+            assert json.loads(entity_path()) == json.loads(row_path())
+            entity_ms = timed(entity_path, repeat=3)
+            row_ms = timed(row_path, repeat=3)
+            route_ms = timed(lambda: client.get('/api/expenses/', headers=user['headers']), repeat=3)
+            rows.append((volume, f'{entity_ms:.1f}', f'{row_ms:.1f}', f'{entity_ms / row_ms:.1f}x', f'{route_ms:.1f}'))
+
+    print_table(('expenses', 'entity+schema ms', 'rows+orjson ms', 'speedup', 'route ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
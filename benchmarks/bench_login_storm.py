@@ -0,0 +1,91 @@
+"""Measure other endpoints' latency during a login storm.
+
+Login threads hammer /api/auth/login while a probe thread polls
+GET /api/accounts/. Runs once with pbkdf2 inline on the request threads
+and once with it in the password hashing process pool, reporting login
+throughput, shed logins and the probe's p50/p99 latency.
+
+Usage: python benchmarks/bench_login_storm.py [login_threads] [seconds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault(
+    'BENCH_DATABASE_URL',
+    'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_login.db')
+)
+
+from _common import create_bench_app, register_user, print_table
+
+from app.passwords import DEFAULT_ROUNDS, PasswordHasher
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def storm(app, user, login_threads, seconds):
+    stop = threading.Event()
+    statuses = []
+    probe_ms = []
+
+    def log_in():
+        client = app.test_client()
+        while not stop.is_set():
+            response = client.post('/api/auth/login', json={'email': 'bench@example.com', 'password': 'secret123'})
+            statuses.append(response.status_code)
+
+    def probe():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/api/accounts/', headers=user['headers'])
+            probe_ms.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.005)
+
+    with ThreadPoolExecutor(max_workers=login_threads + 1) as pool:
+        futures = [pool.submit(log_in) for _ in range(login_threads)] + [pool.submit(probe)]
+        time.sleep(seconds)
+        stop.set()
+        for future in futures:
+            future.result()
+
+    return statuses, probe_ms
+
+
+def main():
+    login_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app = create_bench_app()
+    user = register_user(app.test_client())
+
+    rows = []
+    for label, workers in (('inline', 0), ('process pool', os.cpu_count() or 2)):
+        hasher = PasswordHasher(rounds=DEFAULT_ROUNDS, workers=workers)
+        app.extensions['password_hasher'] = hasher
+        try:
+            hasher.hash('warm up the pool')
+            _, idle_ms = storm(app, user, 0, 1)
+            statuses, probe_ms = storm(app, user, login_threads, seconds)
+        finally:
+            hasher.shutdown()
+
+        rows.append((
+            label,
+            f'{statuses.count(200) / seconds:.0f}',
+            statuses.count(503),
+            f'{percentile(idle_ms, 0.99):.1f}',
+            f'{percentile(probe_ms, 0.5):.1f}',
+            f'{percentile(probe_ms, 0.99):.1f}'
+        ))
+
+    print_table(('hashing', 'logins/s', 'shed', 'idle p99 ms', 'storm p50 ms', 'storm p99 ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
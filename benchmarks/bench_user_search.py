@@ -0,0 +1,80 @@
+"""Benchmark the paged, index-backed user directory against the old
+unbounded ILIKE '%q%' listing.
+
+Usage: python benchmarks/bench_user_search.py [users]
+"""
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from _common import create_bench_app, register_user, timed, print_table
+
+from app import db
+from app.models.user import User
+
+FIRST_NAMES = ['Olena', 'Andrii', 'Maria', 'Taras', 'Iryna', 'Dmytro', 'Sofia', 'Bohdan', 'Anna', 'Petro']
+LAST_NAMES = ['Kovalenko', 'Shevchenko', 'Bondarenko', 'Tkachenko', 'Kravchenko', 'Melnyk', 'Boyko', 'Moroz']
+RARE_NAME = 'Zakharchuk'
+
+
+def seed(users):
+    random.seed(42)
+    start = datetime(2020, 1, 1)
+    batch = []
+    for i in range(users):
+        last_name = RARE_NAME if i % 10000 == 0 else random.choice(LAST_NAMES)
+        batch.append({
+            'id': str(uuid.uuid4()),
+            'name': f'{random.choice(FIRST_NAMES)} {last_name} {i}',
+            'email': f'member{i}@example.com',
+            'password_hash': 'x',
+            'created_at': start + timedelta(seconds=i)
+        })
+        if len(batch) == 10000:
+            db.session.execute(User.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(User.__table__.insert(), batch)
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+def naive(**filters):
+    """The listing before pagination: unbounded ILIKE scans, every row returned."""
+    query = User.query
+    if 'name' in filters:
+        query = query.filter(User.name.ilike(f"%{filters['name']}%"))
+    if 'email' in filters:
+        query = query.filter(User.email.ilike(f"%{filters['email']}%"))
+    return query.order_by(User.created_at.desc()).all()
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        seed(users)
+
+        cases = [
+            ('first page', '', {}),
+            ('rare name', f'name={RARE_NAME}', {'name': RARE_NAME}),
+            ('common name', 'name=shevchenko', {'name': 'shevchenko'}),
+            ('name prefix', 'prefix=Sofia Boyko 1', {'name': 'Sofia Boyko 1'}),
+            ('email', 'email=MEMBER4242@example.com', {'email': 'member4242@example.com'}),
+        ]
+        results = []
+        for label, params, filters in cases:
+            paged = timed(lambda: client.get(f'/api/users/?{params}&limit=50', headers=user['headers']))
+            old = timed(lambda: naive(**filters), repeat=1)
+            results.append((users, label, f'{paged:.1f}', f'{old:.1f}'))
+
+    print_table(('users', 'query', 'paged ms (API)', 'old ILIKE ms'), results)
+
+
+if __name__ == '__main__':
+    main()
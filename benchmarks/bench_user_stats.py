@@ -0,0 +1,60 @@
+"""Benchmark GET /api/users/<id>/stats at 100k expenses per user.
+
+Compares the aggregate query (cache miss), a cached read, a 304
+revalidation and the old per-row Python loop over user.expenses.
+
+Usage: python benchmarks/bench_user_stats.py [expenses]
+"""
+import sys
+
+from _common import create_bench_app, register_user, seed_expenses, count_queries, timed, print_table
+
+from app import db
+from app.models.user import User
+
+
+def old_stats(user_id):
+    """The stats computation before it was aggregated in SQL."""
+    db.session.expire_all()
+    user = db.session.get(User, user_id)
+    total_expenses = sum(expense.amount for expense in user.expenses)
+    return total_expenses, len(user.expenses), user.accounts[0].balance
+
+
+def main():
+    expenses = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = create_bench_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = register_user(client)
+        seed_expenses(user, expenses)
+        url = f"/api/users/{user['user_id']}/stats"
+        headers = user['headers']
+
+        def cache_miss():
+            User.bump_data_version(user['user_id'])
+            db.session.commit()
+            client.get(url, headers=headers)
+
+        User.bump_data_version(user['user_id'])
+        db.session.commit()
+        with count_queries(db.engine) as statements:
+            client.get(url, headers=headers)
+        miss = timed(cache_miss)
+
+        hit = timed(lambda: client.get(url, headers=headers))
+        etag = client.get(url, headers=headers).headers['ETag']
+        revalidate = timed(lambda: client.get(url, headers={**headers, 'If-None-Match': etag}))
+        old = timed(lambda: old_stats(user['user_id']), repeat=3)
+
+    print_table(('expenses', 'path', 'queries', 'best ms'), [
+        (expenses, 'aggregate (cache miss)', len(statements), f'{miss:.1f}'),
+        (expenses, 'cache hit', '', f'{hit:.1f}'),
+        (expenses, '304 revalidation', '', f'{revalidate:.1f}'),
+        (expenses, 'old Python loop', '', f'{old:.1f}'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
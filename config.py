@@ -24,6 +24,36 @@ class Config:
     OPENAPI_SWAGGER_UI_CONFIG = {
         'persistAuthorization': True
     }
+    
+    # Versioned read response cache (shared when a redis URL is given)
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL')
+    RESPONSE_CACHE_TTL = 300
+    RESPONSE_CACHE_SIZE = 1024
+    # Bodies over the entry limit aren't cached; the total bounds each worker
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = 256 * 1024
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    
+    # How long stored Idempotency-Key responses are replayed, in seconds
+    IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+    
+    # Report SQL statements per request in X-Query-Count; raise instead of
+    # logging when a route exceeds its query budget or lazy loads
+    QUERY_COUNT_HEADER = True
+    QUERY_BUDGET_STRICT = False
+    
+    # pbkdf2 cost and the process pool that computes it; logins beyond
+    # the queue limit are shed with 503
+    PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', 29000))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_LIMIT = 32
+    PASSWORD_HASH_TIMEOUT = 10
+    
+    # Per-process cache of JWT identities, in seconds and entries (0 disables)
+    IDENTITY_CACHE_TTL = 30
+    IDENTITY_CACHE_SIZE = 10000
+    
+    # How often each worker loads tokens revoked by the others, in seconds
+    REVOCATION_SYNC_INTERVAL = 5
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -36,6 +66,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
+    QUERY_COUNT_HEADER = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
@@ -43,8 +74,11 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    QUERY_BUDGET_STRICT = True
+    PASSWORD_HASH_ROUNDS = 1000
+    PASSWORD_HASH_WORKERS = 0
 
 config = {
     'development': DevelopmentConfig,
@@ -10,6 +10,10 @@ if [ ! -d "migrations" ]; then
     flask db init
 fi
 
+# Convert legacy float money columns to integer minor units
+echo "Converting money columns..."
+flask money convert
+
 # Create migrations and upgrade database
 echo "Creating database migrations..."
 flask db migrate -m "Initial migration"
@@ -17,4 +21,16 @@ flask db migrate -m "Initial migration"
 echo "Upgrading database..."
 flask db upgrade
 
+# Insert the default global categories
+echo "Seeding global categories..."
+flask categories seed
+
+# Seed the balance ledger of accounts created before it existed
+echo "Backfilling balance ledger..."
+flask ledger backfill
+
+# Count the expenses of categories and accounts created before the counters
+echo "Rebuilding expense counters..."
+flask counters rebuild
+
 echo "Database initialized successfully!"
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app import create_app, db
+from config import config, TestingConfig
+
+
+@pytest.fixture
+def app():
+    """Create and configure a new app instance for each test."""
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def threaded_app(tmp_path, monkeypatch):
+    """An app on a file database so several threads can write at once."""
+    class ThreadedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', f"sqlite:///{tmp_path / 'threads.db'}")
+
+    monkeypatch.setitem(config, 'threaded', ThreadedConfig)
+    app = create_app('threaded')
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """A test client for the app."""
+    return app.test_client()
+
+
+def run_parallel(calls, workers=8):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda call: call(), calls))
+
+
+def register_user(client, name='Test User', email='test@example.com', password='secret123'):
+    """Register and log in a user, returning ids and auth headers."""
+    client.post('/api/auth/register', json={
+        'name': name,
+        'email': email,
+        'password': password,
+        'confirm_password': password
+    })
+    login = client.post('/api/auth/login', json={'email': email, 'password': password}).get_json()
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+
+    account_id = client.get('/api/accounts/', headers=headers).get_json()[0]['id']
+    categories = client.get('/api/categories/global', headers=headers).get_json()
+
+    return {
+        'user_id': login['user']['id'],
+        'account_id': account_id,
+        'category_ids': {category['name']: category['id'] for category in categories},
+        'headers': headers
+    }
+
+
+def post_expense(client, user, amount=10.0):
+    """Create a Food expense from the user's default account."""
+    return client.post('/api/expenses/', json={
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': amount
+    }, headers=user['headers'])
+
+
+@pytest.fixture
+def user(client):
+    """A registered, logged in user with a default account."""
+    return register_user(client)
+
+
+@pytest.fixture
+def decimal_sums(monkeypatch):
+    """Make SUM() return Decimal, as PostgreSQL's SUM(bigint) does."""
+    from sqlalchemy import Numeric
+    from sqlalchemy.sql import functions
+
+    registry = functions._registry['_default']
+    monkeypatch.setitem(registry, 'sum', registry['sum'])
+
+    # Defining the class registers it; the monkeypatch restores the original
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+
+        class sum(functions.GenericFunction):
+            type = Numeric(asdecimal=True)
+            inherit_cache = True
+
+
+@pytest.fixture
+def query_counter(app):
+    """Count SQL statements executed while the returned list is being filled."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
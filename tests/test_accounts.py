@@ -0,0 +1,230 @@
+from datetime import datetime
+
+from app import db
+from conftest import register_user, run_parallel
+
+
+def test_concurrent_expenses_and_incomes_keep_balance(threaded_app):
+    """Parallel expense and income posts on one account lose no updates."""
+    client = threaded_app.test_client()
+    user = register_user(client)
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 1000.0}, headers=headers)
+
+    expense = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': 10.0
+    }
+    calls = [
+        lambda: threaded_app.test_client().post('/api/expenses/', json=expense, headers=headers)
+        for _ in range(40)
+    ] + [
+        lambda: threaded_app.test_client().post(f"/api/accounts/{user['account_id']}/income",
+                                                json={'amount': 3.0}, headers=headers)
+        for _ in range(20)
+    ]
+
+    responses = run_parallel(calls)
+
+    assert [response.status_code for response in responses] == [201] * 60
+    balance = client.get(f"/api/accounts/{user['account_id']}/balance", headers=headers).get_json()
+    assert balance['balance'] == 1000.0 - 40 * 10.0 + 20 * 3.0
+
+
+def test_concurrent_withdrawals_never_overdraw(threaded_app):
+    """Only as many parallel expenses succeed as the balance covers."""
+    client = threaded_app.test_client()
+    user = register_user(client)
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=headers)
+
+    expense = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': 10.0
+    }
+    responses = run_parallel([
+        lambda: threaded_app.test_client().post('/api/expenses/', json=expense, headers=headers)
+        for _ in range(25)
+    ])
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == 10
+    assert statuses.count(400) == 15
+    balance = client.get(f"/api/accounts/{user['account_id']}/balance", headers=headers).get_json()
+    assert balance['balance'] == 0.0
+
+
+def test_amounts_round_trip_as_minor_units(client, user):
+    """Amounts are stored as integer cents and summed without float drift."""
+    from app.models.account import Account
+
+    headers = user['headers']
+    for _ in range(10):
+        client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 0.1}, headers=headers)
+
+    assert db.session.get(Account, user['account_id']).balance == 100
+    balance = client.get(f"/api/accounts/{user['account_id']}/balance", headers=headers).get_json()
+    assert balance['balance'] == 1.0
+
+    income = client.get(f"/api/accounts/{user['account_id']}/income", headers=headers).get_json()
+    assert income[0]['amount'] == 0.1
+
+
+def test_amounts_beyond_int64_are_rejected(client, user):
+    """Huge amounts get a 422, and deposits never push a balance past bigint."""
+    from app.models.account import Account
+    from app.money import MAX_AMOUNT, MAX_BALANCE
+
+    headers = user['headers']
+    url = f"/api/accounts/{user['account_id']}/income"
+
+    assert client.post(url, json={'amount': 1e20}, headers=headers).status_code == 422
+    assert client.get('/api/expenses/?max_amount=1e20', headers=headers).status_code == 422
+
+    Account.query.filter_by(id=user['account_id']).update({'balance': MAX_BALANCE - MAX_AMOUNT + 1})
+    db.session.commit()
+    response = client.post(url, json={'amount': MAX_AMOUNT / 100}, headers=headers)
+
+    assert response.status_code == 400
+    assert db.session.get(Account, user['account_id']).balance == MAX_BALANCE - MAX_AMOUNT + 1
+
+
+def test_money_convert_command(app):
+    """Legacy float money columns are converted to integer minor units."""
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from sqlalchemy import BigInteger, Float, Integer, inspect, text
+
+    with db.engine.begin() as connection:
+        operations = Operations(MigrationContext.configure(connection))
+        with operations.batch_alter_table('accounts') as batch:
+            batch.alter_column('balance', type_=Float(), existing_type=BigInteger())
+        connection.execute(text(
+            "INSERT INTO users (id, name, email, password_hash) VALUES ('u1', 'Legacy', 'legacy@example.com', 'x')"
+        ))
+        connection.execute(text("INSERT INTO accounts (id, user_id, balance) VALUES ('a1', 'u1', 12.34)"))
+
+    result = app.test_cli_runner().invoke(args=['money', 'convert'])
+    assert result.exit_code == 0, result.output
+    assert 'accounts.balance' in result.output
+
+    with db.engine.connect() as connection:
+        columns = {col['name']: col['type'] for col in inspect(connection).get_columns('accounts')}
+        assert isinstance(columns['balance'], Integer)
+        assert connection.execute(text("SELECT balance FROM accounts WHERE id = 'a1'")).scalar() == 1234
+
+    result = app.test_cli_runner().invoke(args=['money', 'convert'])
+    assert 'already use minor units' in result.output
+
+
+def test_balance_at_point_in_time(client, user, monkeypatch):
+    """balance?at= replays the ledger from the nearest checkpoint."""
+    from app.models.balance_ledger import BalanceCheckpoint
+
+    monkeypatch.setattr(BalanceCheckpoint, 'INTERVAL', 3)
+    headers = user['headers']
+    url = f"/api/accounts/{user['account_id']}/balance"
+    expense = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+    }
+
+    history = [(datetime.utcnow(), 0.0)]
+    for amount in (100.0, 50.0, 25.0, 10.0):
+        client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': amount}, headers=headers)
+        history.append((datetime.utcnow(), history[-1][1] + amount))
+
+    expense_id = client.post('/api/expenses/', json={**expense, 'amount': 30.0}, headers=headers).get_json()['id']
+    history.append((datetime.utcnow(), history[-1][1] - 30.0))
+    client.put(f'/api/expenses/{expense_id}', json={'amount': 40.0}, headers=headers)
+    history.append((datetime.utcnow(), history[-1][1] - 10.0))
+    client.delete(f'/api/expenses/{expense_id}', headers=headers)
+    history.append((datetime.utcnow(), history[-1][1] + 40.0))
+
+    assert BalanceCheckpoint.query.count() == 2
+    for at, expected in history:
+        response = client.get(url, query_string={'at': at.isoformat()}, headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['balance'] == expected, at
+
+    current = client.get(url, headers=headers).get_json()['balance']
+    assert current == history[-1][1] == 185.0
+
+
+def test_ledger_backfill_command(app, user):
+    """Accounts that predate the ledger get entries summing to their balance."""
+    from app.models.account import Account
+    from app.models.balance_ledger import BalanceCheckpoint, BalanceEntry
+    from app.models.income import Income
+
+    db.session.add_all([
+        Income(account_id=user['account_id'], amount=5000),
+        Income(account_id=user['account_id'], amount=2500),
+    ])
+    db.session.execute(Account.__table__.update().values(balance=7000))
+    db.session.commit()
+    assert BalanceEntry.mismatches()
+
+    result = app.test_cli_runner().invoke(args=['ledger', 'backfill'])
+    assert result.exit_code == 0, result.output
+    assert 'Seeded the balance ledger of 1 accounts' in result.output
+
+    amounts = [entry.amount for entry in BalanceEntry.query.order_by(BalanceEntry.id)]
+    assert amounts == [5000, 2500, -500]
+    assert BalanceEntry.mismatches() == []
+    assert BalanceCheckpoint.balance_at(user['account_id'], datetime(9999, 1, 1)) == 7000
+
+    result = app.test_cli_runner().invoke(args=['ledger', 'verify'])
+    assert result.exit_code == 0, result.output
+
+
+def test_statement_merges_and_pages_with_running_balance(client, user):
+    """The statement interleaves incomes and expenses and carries the balance across pages."""
+    headers = user['headers']
+    expense = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+    }
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=headers)
+    client.post('/api/expenses/', json={**expense, 'amount': 30.0, 'description': 'Groceries'}, headers=headers)
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 20.0}, headers=headers)
+    client.post('/api/expenses/', json={**expense, 'amount': 5.5}, headers=headers)
+    client.post('/api/expenses/', json={**expense, 'amount': 4.5}, headers=headers)
+
+    entries = []
+    url = f"/api/accounts/{user['account_id']}/statement?limit=2"
+    while url:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()) <= 2
+        entries.extend(response.get_json())
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+
+    assert [(e['type'], e['amount'], e['balance']) for e in entries] == [
+        ('expense', -4.5, 80.0),
+        ('expense', -5.5, 84.5),
+        ('income', 20.0, 90.0),
+        ('expense', -30.0, 70.0),
+        ('income', 100.0, 100.0),
+    ]
+    assert entries[3]['description'] == 'Groceries'
+
+    invalid = client.get(f"/api/accounts/{user['account_id']}/statement?cursor=bogus", headers=headers)
+    assert invalid.status_code == 400
+
+
+def test_account_delete_is_guarded_by_exists(client, user):
+    """An account with transactions can't be deleted; an empty one can."""
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=headers)
+    other = register_user(client, name='Other User', email='other@example.com')
+
+    assert client.delete(f"/api/accounts/{user['account_id']}", headers=headers).status_code == 400
+    assert client.delete(f"/api/accounts/{other['account_id']}", headers=other['headers']).status_code == 204
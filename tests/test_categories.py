@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app, db
+from app.global_categories import DEFAULT_GLOBAL_CATEGORIES
+from app.models.category import Category
+from config import config, TestingConfig
+from conftest import register_user
+
+
+def test_registration_only_inserts_the_user_and_account(client, query_counter):
+    response = client.post('/api/auth/register', json={
+        'name': 'New User',
+        'email': 'new@example.com',
+        'password': 'secret123',
+        'confirm_password': 'secret123'
+    })
+
+    assert response.status_code == 201
+    assert not [s for s in query_counter if 'categories' in s]
+    inserts = [s for s in query_counter if s.startswith('INSERT')]
+    assert len(inserts) == 2
+
+
+def test_global_categories_are_served_from_memory(client, user, query_counter):
+    query_counter.clear()
+    response = client.get('/api/categories/global', headers=user['headers'])
+
+    assert sorted(c['name'] for c in response.get_json()) == sorted(DEFAULT_GLOBAL_CATEGORIES)
+    assert not [s for s in query_counter if 'categories' in s]
+
+
+def test_category_list_merges_personal_and_global_categories(client, user):
+    headers = user['headers']
+    client.post('/api/categories/', json={'name': 'Books'}, headers=headers)
+
+    categories = client.get('/api/categories/', headers=headers).get_json()
+    assert categories[0]['name'] == 'Books'
+    assert {c['name'] for c in categories} == {'Books', *DEFAULT_GLOBAL_CATEGORIES}
+
+    personal = client.get('/api/categories/?is_global=false', headers=headers).get_json()
+    assert [c['name'] for c in personal] == ['Books']
+
+    matching = client.get('/api/categories/?name=o', headers=headers).get_json()
+    assert {c['name'] for c in matching} == {'Books', 'Food', 'Transportation', 'Shopping'}
+
+
+def test_global_categories_are_seeded_once(app):
+    result = app.test_cli_runner().invoke(args=['categories', 'seed'])
+    assert result.exit_code == 0, result.output
+    result = app.test_cli_runner().invoke(args=['categories', 'seed'])
+    assert result.exit_code == 0, result.output
+
+    assert Category.query.filter_by(is_global=True).count() == len(DEFAULT_GLOBAL_CATEGORIES)
+
+    db.session.add(Category(name='Food', is_global=True))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_app_starts_before_the_categories_table_is_upgraded(tmp_path, monkeypatch):
+    """Startup and flask commands don't read columns added by later upgrades."""
+    database = tmp_path / 'legacy.db'
+
+    class LegacyConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+
+    monkeypatch.setitem(config, 'legacy', LegacyConfig)
+    with sqlite3.connect(database) as connection:
+        connection.execute(
+            'CREATE TABLE categories (id VARCHAR(36) PRIMARY KEY, name VARCHAR(100) NOT NULL, '
+            'is_global BOOLEAN, user_id VARCHAR(36), created_at DATETIME)'
+        )
+
+    app = create_app('legacy')
+    result = app.test_cli_runner().invoke(args=['money', 'convert'])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE categories ADD COLUMN expense_count BIGINT'))
+        result = app.test_cli_runner().invoke(args=['categories', 'seed'])
+        assert result.exit_code == 0, result.output
+        assert Category.query.filter_by(is_global=True).count() == len(DEFAULT_GLOBAL_CATEGORIES)
+        db.session.remove()
+        db.drop_all()
+
+
+def test_category_update_cannot_make_it_global(client, user):
+    headers = user['headers']
+    category = client.post('/api/categories/', json={'name': 'Books'}, headers=headers).get_json()
+    url = f"/api/categories/{category['id']}"
+
+    assert client.put(url, json={'is_global': True}, headers=headers).status_code == 403
+    other = register_user(client, name='Other User', email='other@example.com')
+    assert client.put(url, json={'user_id': other['user_id']}, headers=headers).status_code == 403
+
+    response = client.put(url, json={'name': 'Novels', 'is_global': False}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['is_global'] is False
+    assert response.get_json()['user_id'] == user['user_id']
+    assert {c['name'] for c in client.get('/api/categories/global', headers=headers).get_json()} == \
+        set(DEFAULT_GLOBAL_CATEGORIES)
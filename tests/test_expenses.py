@@ -0,0 +1,518 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from app import db
+from app.models.expense import Expense
+from app.models.expense_rollup import ExpenseRollup
+from app.models.user import User
+from app.money import from_minor_units, to_minor_units
+from app.schemas.expense_schema import ExpenseSchema
+
+
+def add_expenses(user, amounts, category='Food', created_at=None):
+    """Insert expenses directly, bypassing the balance checks."""
+    for amount in amounts:
+        db.session.add(Expense(
+            user_id=user['user_id'],
+            category_id=user['category_ids'][category],
+            account_id=user['account_id'],
+            amount=to_minor_units(amount),
+            created_at=created_at or datetime.utcnow()
+        ))
+    User.bump_data_version(user['user_id'])
+    db.session.commit()
+    ExpenseRollup.rebuild()
+
+
+def test_expense_summary_empty(client, user):
+    """Summary of a user without expenses is all zeros."""
+    response = client.get('/api/expenses/summary', headers=user['headers'])
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "total_expenses": 0,
+        "expense_count": 0,
+        "average_expense": 0,
+        "by_category": {},
+        "by_month": {}
+    }
+
+
+def test_expense_summary_groups(client, user):
+    """Summary groups totals by category name and by month."""
+    add_expenses(user, [10.0, 20.0], category='Food', created_at=datetime(2024, 1, 15))
+    add_expenses(user, [30.0], category='Shopping', created_at=datetime(2024, 2, 1))
+
+    data = client.get('/api/expenses/summary', headers=user['headers']).get_json()
+
+    assert data['total_expenses'] == 60.0
+    assert data['expense_count'] == 3
+    assert data['average_expense'] == 20.0
+    assert data['by_category'] == {
+        'Food': {'total': 30.0, 'count': 2},
+        'Shopping': {'total': 30.0, 'count': 1}
+    }
+    assert data['by_month'] == {
+        '2024-01': {'total': 30.0, 'count': 2},
+        '2024-02': {'total': 30.0, 'count': 1}
+    }
+
+
+def test_expense_summary_query_count_is_flat(client, user, query_counter):
+    """The number of summary queries does not grow with expense volume."""
+    add_expenses(user, [1.0] * 5)
+    query_counter.clear()
+    client.get('/api/expenses/summary', headers=user['headers'])
+    small = len(query_counter)
+
+    add_expenses(user, [1.0] * 50, category='Shopping')
+    query_counter.clear()
+    client.get('/api/expenses/summary', headers=user['headers'])
+
+    assert len(query_counter) == small
+
+
+def test_decimal_sums_dump_as_json_numbers(app):
+    """PostgreSQL returns SUM(bigint) as Decimal; it must still dump as a number."""
+    total = from_minor_units(Decimal(1234))
+
+    assert total == 12.34
+    assert json.loads(app.json.dumps({'total': total})) == {'total': 12.34}
+
+
+def test_list_bodies_keep_non_ascii_text_as_utf8(app, client, user):
+    """orjson writes non-ASCII as UTF-8 where Flask's default provider escapes it."""
+    from flask.json.provider import DefaultJSONProvider
+
+    add_expenses(user, [1.0])
+    Expense.query.update({'description': 'Кава з молоком'})
+    db.session.commit()
+
+    body = client.get('/api/expenses/', headers=user['headers']).data
+    items = json.loads(body)
+
+    assert items[0]['description'] == 'Кава з молоком'
+    assert 'Кава з молоком'.encode() in body
+    assert body == (json.dumps(items, ensure_ascii=False, sort_keys=True, separators=(',', ':')) + '\n').encode()
+    assert json.loads(DefaultJSONProvider(app).dumps(items)) == items
+    assert app.json.dumps(items, indent=2) == json.dumps(items, ensure_ascii=False, sort_keys=True, indent=2)
+
+
+def test_expense_list_keyset_pagination(client, user):
+    """Pages follow the Link header cursor and never repeat or skip rows."""
+    add_expenses(user, [float(amount) for amount in range(1, 8)], created_at=datetime(2024, 3, 1))
+    add_expenses(user, [100.0, 200.0], category='Shopping', created_at=datetime(2024, 3, 2))
+
+    seen = []
+    url = '/api/expenses/?limit=4'
+    while url:
+        response = client.get(url, headers=user['headers'])
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= 4
+        seen.extend(expense['id'] for expense in page)
+
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+
+    assert len(seen) == 9
+    assert len(set(seen)) == 9
+
+
+def test_expense_list_cursor_composes_with_filters(client, user):
+    """Filters keep applying on every page of a cursor scan."""
+    add_expenses(user, [5.0, 15.0, 25.0, 35.0], created_at=datetime(2024, 3, 1))
+    add_expenses(user, [45.0], category='Shopping', created_at=datetime(2024, 3, 1))
+
+    food_id = user['category_ids']['Food']
+    first = client.get(f'/api/expenses/?limit=1&min_amount=10&category_id={food_id}',
+                       headers=user['headers'])
+    link = first.headers['Link']
+    second = client.get(link[1:link.index('>')], headers=user['headers'])
+
+    amounts = [expense['amount'] for expense in first.get_json() + second.get_json()]
+    assert len(amounts) == 2
+    assert all(10 <= amount <= 35 for amount in amounts)
+
+
+def test_expense_list_invalid_cursor(client, user):
+    """A malformed cursor is rejected."""
+    response = client.get('/api/expenses/?cursor=not-a-cursor', headers=user['headers'])
+    assert response.status_code == 400
+
+
+def test_expense_writes_resolve_references_in_one_query(client, user, query_counter):
+    """Create and update look up user, category and account with one SELECT."""
+    client.post(f"/api/accounts/{user['account_id']}/income",
+                json={'amount': 100.0}, headers=user['headers'])
+    expense = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': 10.0
+    }
+
+    query_counter.clear()
+    created = client.post('/api/expenses/', json=expense, headers=user['headers'])
+    assert created.status_code == 201
+    post_selects = [statement for statement in query_counter if statement.startswith('SELECT')]
+
+    query_counter.clear()
+    updated = client.put(f"/api/expenses/{created.get_json()['id']}", json={
+        'amount': 12.0,
+        'category_id': user['category_ids']['Shopping'],
+        'account_id': user['account_id']
+    }, headers=user['headers'])
+    assert updated.status_code == 200
+    put_selects = [statement for statement in query_counter if statement.startswith('SELECT')]
+
+    # Reference resolution and the post-commit refresh; the token user
+    # comes from the identity cache
+    assert len(post_selects) == 2
+    assert len(put_selects) == 2
+    for selects in (post_selects, put_selects):
+        assert len([s for s in selects if 'categories' in s or 'accounts' in s]) == 1
+
+
+def test_expense_batch_creates_and_reports_per_item(client, user, query_counter):
+    """A batch inserts valid items, withdraws once and reports failures per item."""
+    client.post(f"/api/accounts/{user['account_id']}/income",
+                json={'amount': 100.0}, headers=user['headers'])
+
+    item = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id']
+    }
+    batch = [
+        {**item, 'amount': 30.0, 'description': 'Groceries'},
+        {**item, 'amount': -5.0},
+        {**item, 'category_id': 'missing', 'amount': 1.0},
+        {**item, 'amount': 60.0},
+        {**item, 'amount': 20.0},
+    ]
+
+    query_counter.clear()
+    response = client.post('/api/expenses/batch', json={'expenses': batch}, headers=user['headers'])
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['created'] == 2
+    assert data['failed'] == 3
+    assert [result['status'] for result in data['results']] == [201, 422, 404, 201, 400]
+    assert data['results'][4]['message'] == 'Insufficient funds'
+
+    inserts = [statement for statement in query_counter if statement.startswith('INSERT INTO expenses')]
+    assert len(inserts) == 1
+
+    balance = client.get(f"/api/accounts/{user['account_id']}/balance", headers=user['headers'])
+    assert balance.get_json()['balance'] == 10.0
+
+    expenses = client.get('/api/expenses/', headers=user['headers']).get_json()
+    assert sorted(expense['amount'] for expense in expenses) == [30.0, 60.0]
+
+
+def test_expense_export_ndjson(client, user):
+    """NDJSON export streams one filtered expense per line."""
+    add_expenses(user, [5.0, 15.0, 25.0])
+
+    response = client.get('/api/expenses/export?min_amount=10', headers=user['headers'])
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(row['amount'] for row in rows) == [15.0, 25.0]
+    assert set(rows[0]) == {'id', 'user_id', 'category_id', 'account_id', 'amount', 'description'}
+
+
+def test_expense_export_csv(client, user):
+    """CSV export writes a header row followed by one row per expense."""
+    add_expenses(user, [5.0, 15.0])
+
+    response = client.get('/api/expenses/export?format=csv', headers=user['headers'])
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert sorted(float(row['amount']) for row in rows) == [5.0, 15.0]
+
+
+def test_income_export(client, user):
+    """Income export applies the same date filters as the income list."""
+    client.post(f"/api/accounts/{user['account_id']}/income",
+                json={'amount': 100.0, 'description': 'Salary'}, headers=user['headers'])
+
+    response = client.get(f"/api/accounts/{user['account_id']}/income/export?format=ndjson",
+                          headers=user['headers'])
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['description'] for row in rows] == ['Salary']
+
+    response = client.get(f"/api/accounts/{user['account_id']}/income/export?start_date=2100-01-01T00:00:00",
+                          headers=user['headers'])
+    assert response.get_data(as_text=True) == ''
+
+
+def test_expense_rollups_follow_writes(client, user):
+    """Create, update and delete keep the rollups equal to the raw table."""
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 500.0}, headers=headers)
+
+    item = {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id']
+    }
+    first = client.post('/api/expenses/', json={**item, 'amount': 40.0}, headers=headers).get_json()
+    client.post('/api/expenses/', json={**item, 'amount': 10.0}, headers=headers)
+    client.post('/api/expenses/batch', json={'expenses': [{**item, 'amount': 5.0}] * 3}, headers=headers)
+    assert ExpenseRollup.mismatches() == []
+
+    client.put(f"/api/expenses/{first['id']}", json={
+        'amount': 25.0,
+        'category_id': user['category_ids']['Shopping']
+    }, headers=headers)
+    assert ExpenseRollup.mismatches() == []
+
+    summary = client.get('/api/expenses/summary', headers=headers).get_json()
+    assert summary['total_expenses'] == 50.0
+    assert summary['by_category'] == {
+        'Food': {'total': 25.0, 'count': 4},
+        'Shopping': {'total': 25.0, 'count': 1}
+    }
+
+    client.delete(f"/api/expenses/{first['id']}", headers=headers)
+    assert ExpenseRollup.mismatches() == []
+    assert ExpenseRollup.query.filter_by(category_id=user['category_ids']['Shopping']).count() == 0
+
+
+def test_rollups_rebuild_command(app, user):
+    """The rebuild command repairs drifted rollups."""
+    add_expenses(user, [10.0, 20.0])
+    ExpenseRollup.query.update({'total': 0})
+    db.session.commit()
+    assert ExpenseRollup.mismatches()
+
+    result = app.test_cli_runner().invoke(args=['rollups', 'rebuild'])
+
+    assert result.exit_code == 0, result.output
+    assert ExpenseRollup.mismatches() == []
+
+
+def test_expense_timeseries_buckets_and_gap_fills(client, user):
+    """Daily buckets cover the requested range with zeros for empty days."""
+    add_expenses(user, [10.0, 5.0], created_at=datetime(2024, 5, 1, 9, 30))
+    add_expenses(user, [2.5], category='Shopping', created_at=datetime(2024, 5, 3, 18, 0))
+
+    response = client.get('/api/expenses/timeseries?interval=day'
+                          '&start_date=2024-04-30T00:00:00&end_date=2024-05-04T00:00:00',
+                          headers=user['headers'])
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'interval': 'day',
+        'timestamps': ['2024-04-30', '2024-05-01', '2024-05-02', '2024-05-03', '2024-05-04'],
+        'totals': [0, 15.0, 0, 2.5, 0],
+        'counts': [0, 2, 0, 1, 0]
+    }
+
+
+def test_expense_timeseries_totals_are_json_numbers(client, user, decimal_sums):
+    """Bucket totals dump as numbers when SUM() returns Decimal, as on PostgreSQL."""
+    add_expenses(user, [10.25, 2.0], created_at=datetime(2024, 5, 1))
+
+    response = client.get('/api/expenses/timeseries?interval=day', headers=user['headers'])
+
+    assert b'"12.25"' not in response.data
+    totals = response.get_json()['totals']
+    assert totals == [12.25] and isinstance(totals[0], float)
+
+
+def test_expense_timeseries_week_and_month(client, user):
+    """Weeks start on Monday and months on the first, with filters applied."""
+    add_expenses(user, [1.0], created_at=datetime(2024, 1, 3))   # Wednesday
+    add_expenses(user, [2.0], created_at=datetime(2024, 1, 7))   # Sunday, same week
+    add_expenses(user, [4.0], created_at=datetime(2024, 3, 11))  # Monday
+    add_expenses(user, [8.0], category='Shopping', created_at=datetime(2024, 1, 4))
+
+    food_id = user['category_ids']['Food']
+    weekly = client.get(f'/api/expenses/timeseries?interval=week&category_id={food_id}',
+                        headers=user['headers']).get_json()
+    assert weekly['timestamps'][0] == '2024-01-01'
+    assert weekly['timestamps'][-1] == '2024-03-11'
+    assert weekly['totals'][0] == 3.0
+    assert len(weekly['timestamps']) == 11
+
+    monthly = client.get('/api/expenses/timeseries?interval=month', headers=user['headers']).get_json()
+    assert monthly['timestamps'] == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert monthly['totals'] == [11.0, 0, 4.0]
+
+
+def add_described_expenses(user, descriptions, created_at=None):
+    for description in descriptions:
+        db.session.add(Expense(
+            user_id=user['user_id'],
+            category_id=user['category_ids']['Food'],
+            account_id=user['account_id'],
+            amount=100,
+            description=description,
+            created_at=created_at or datetime.utcnow()
+        ))
+    User.bump_data_version(user['user_id'])
+    db.session.commit()
+
+
+def test_expense_search_ranks_matches(client, user):
+    """q returns only matching descriptions, best matches first."""
+    add_described_expenses(user, [
+        'Coffee beans',
+        'Coffee coffee coffee with friends at the coffee place',
+        'Train ticket',
+        'Lunch (with "coffee")',
+    ])
+
+    response = client.get('/api/expenses/?q=coffee', headers=user['headers'])
+
+    assert response.status_code == 200
+    descriptions = [expense['description'] for expense in response.get_json()]
+    assert len(descriptions) == 3
+    assert 'Train ticket' not in descriptions
+    assert descriptions[0] == 'Coffee coffee coffee with friends at the coffee place'
+
+    response = client.get('/api/expenses/?q=coffee%20beans', headers=user['headers'])
+    assert [expense['description'] for expense in response.get_json()] == ['Coffee beans']
+
+
+def test_expense_search_rank_is_double_precision_on_postgresql(app, monkeypatch):
+    """A float4 rank would not round-trip through the cursor exactly."""
+    from sqlalchemy.dialects import postgresql
+    from app import search
+
+    monkeypatch.setattr(search, '_is_postgresql', lambda: True)
+    sql = str(search.search_rank('coffee').compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith('CAST(ts_rank(') and 'AS FLOAT(53))' in sql
+
+
+def test_expense_search_follows_updates_and_pages(client, user):
+    """Search stays in sync with edits and paginates through ranked results."""
+    add_described_expenses(user, ['Taxi home %d' % i for i in range(5)])
+    expense_id = client.get('/api/expenses/?q=taxi', headers=user['headers']).get_json()[0]['id']
+    db.session.get(Expense, expense_id).description = 'Bus'
+    db.session.commit()
+
+    seen = []
+    url = '/api/expenses/?q=taxi&limit=2'
+    while url:
+        response = client.get(url, headers=user['headers'])
+        seen.extend(expense['id'] for expense in response.get_json())
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+
+    assert len(seen) == 4
+    assert len(set(seen)) == 4
+    assert expense_id not in seen
+
+    response = client.get('/api/expenses/?q=%22%2A(', headers=user['headers'])
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+
+def test_expense_list_sparse_fieldset(client, user, query_counter):
+    """fields= narrows both the SELECT and the serialized objects."""
+    add_described_expenses(user, ['Coffee', 'Tea'])
+
+    query_counter.clear()
+    response = client.get('/api/expenses/?fields=id,amount&limit=1', headers=user['headers'])
+
+    assert response.status_code == 200
+    assert response.get_json()[0].keys() == {'id', 'amount'}
+    assert response.get_json()[0]['amount'] == 1.0
+    assert 'Link' in response.headers
+    select = next(statement for statement in query_counter if 'FROM expenses' in statement)
+    assert 'expenses.description' not in select
+
+
+def test_list_endpoints_reject_unknown_fields(client, user):
+    """Only dumpable schema fields can be requested."""
+    assert client.get('/api/expenses/?fields=password', headers=user['headers']).status_code == 422
+    assert client.get('/api/categories/?fields=name', headers=user['headers']).get_json()[0].keys() == {'name'}
+    accounts = client.get('/api/accounts/?fields=balance', headers=user['headers']).get_json()
+    assert accounts == [{'balance': 0.0}]
+
+
+def test_expense_list_matches_schema_dump(client, user):
+    """The row-tuple fast path serializes exactly like ExpenseSchema."""
+    add_described_expenses(user, ['Coffee', None])
+    add_expenses(user, [12.34, 0.01])
+
+    response = client.get('/api/expenses/', headers=user['headers'])
+
+    expected = ExpenseSchema(many=True).dump(Expense.query.order_by(Expense.created_at.desc()).all())
+    assert sorted(response.get_json(), key=lambda e: e['id']) == sorted(expected, key=lambda e: e['id'])
+    assert response.data.endswith(b'\n')
+    body = response.data.decode()
+    assert body.index('"account_id"') < body.index('"amount"') < body.index('"user_id"')
+
+
+def test_expense_counters_follow_writes(client, user):
+    """Create, batch, move and delete keep the usage counters equal to the raw table."""
+    from app import usage_counters
+
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 500.0}, headers=headers)
+    personal = client.post('/api/categories/', json={'name': 'Books'}, headers=headers).get_json()
+
+    item = {
+        'user_id': user['user_id'],
+        'category_id': personal['id'],
+        'account_id': user['account_id']
+    }
+    first = client.post('/api/expenses/', json={**item, 'amount': 40.0}, headers=headers).get_json()
+    client.post('/api/expenses/batch', json={'expenses': [{**item, 'amount': 5.0}] * 3}, headers=headers)
+    client.put(f"/api/expenses/{first['id']}", json={'category_id': user['category_ids']['Food']}, headers=headers)
+    assert usage_counters.mismatches() == []
+
+    categories = {c['name']: c for c in client.get('/api/categories/', headers=headers).get_json()}
+    assert categories['Books']['expense_count'] == 3
+    assert categories['Food']['expense_count'] is None
+    assert client.get('/api/accounts/', headers=headers).get_json()[0]['expense_count'] == 4
+
+    client.delete(f"/api/expenses/{first['id']}", headers=headers)
+    assert usage_counters.mismatches() == []
+    assert client.get('/api/accounts/', headers=headers).get_json()[0]['expense_count'] == 3
+
+
+def test_category_delete_is_guarded_by_exists(client, user):
+    """A category with expenses can't be deleted; an unused one can."""
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=headers)
+    used = client.post('/api/categories/', json={'name': 'Books'}, headers=headers).get_json()
+    unused = client.post('/api/categories/', json={'name': 'Games'}, headers=headers).get_json()
+    client.post('/api/expenses/', json={
+        'user_id': user['user_id'],
+        'category_id': used['id'],
+        'account_id': user['account_id'],
+        'amount': 10.0
+    }, headers=headers)
+
+    assert client.delete(f"/api/categories/{used['id']}", headers=headers).status_code == 400
+    assert client.delete(f"/api/categories/{unused['id']}", headers=headers).status_code == 204
+
+
+def test_counters_rebuild_command(app, user):
+    """The rebuild command repairs drifted counters."""
+    from app import usage_counters
+    from app.models.account import Account
+
+    add_expenses(user, [10.0, 20.0])
+    Account.query.update({'expense_count': 0})
+    db.session.commit()
+    assert usage_counters.mismatches()
+
+    result = app.test_cli_runner().invoke(args=['counters', 'rebuild'])
+
+    assert result.exit_code == 0, result.output
+    assert usage_counters.mismatches() == []
+    assert db.session.get(Account, user['account_id']).expense_count == 2
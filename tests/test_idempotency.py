@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.account import Account
+from app.models.expense import Expense
+from app.models.idempotency_key import IdempotencyKey
+from conftest import register_user, run_parallel
+
+
+def expense_payload(user, amount=10.0):
+    return {
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': amount
+    }
+
+
+def with_key(user, key):
+    return {**user['headers'], 'Idempotency-Key': key}
+
+
+def deposit(client, user, amount):
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': amount}, headers=user['headers'])
+
+
+def test_retry_replays_original_expense(client, user, query_counter):
+    """A retried expense POST returns the stored response and withdraws once."""
+    deposit(client, user, 100.0)
+
+    first = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'retry-1'))
+    query_counter.clear()
+    retry = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'retry-1'))
+    replay_statements = list(query_counter)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert Expense.query.count() == 1
+    assert db.session.get(Account, user['account_id']).balance == 9000
+    assert not [s for s in replay_statements if 'accounts' in s or 'expenses' in s]
+
+
+def test_retry_replays_original_income(client, user):
+    """Income POSTs are deduplicated the same way."""
+    url = f"/api/accounts/{user['account_id']}/income"
+    for _ in range(3):
+        response = client.post(url, json={'amount': 50.0}, headers=with_key(user, 'salary-2024-05'))
+        assert response.status_code == 201
+
+    assert db.session.get(Account, user['account_id']).balance == 5000
+
+
+def test_key_reused_with_different_request_is_rejected(client, user):
+    """A key cannot be replayed for a request with a different body."""
+    deposit(client, user, 100.0)
+    client.post('/api/expenses/', json=expense_payload(user, 10.0), headers=with_key(user, 'k'))
+
+    response = client.post('/api/expenses/', json=expense_payload(user, 20.0), headers=with_key(user, 'k'))
+
+    assert response.status_code == 422
+    assert Expense.query.count() == 1
+
+
+def test_failed_request_does_not_consume_key(client, user):
+    """A rejected request can be retried with the same key once it would succeed."""
+    failed = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'later'))
+    assert failed.status_code == 400
+
+    deposit(client, user, 100.0)
+    retry = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'later'))
+
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+
+
+def test_write_and_stored_response_commit_together(client, user, monkeypatch):
+    """A failure while storing the response leaves neither the write nor a stuck key."""
+    deposit(client, user, 100.0)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('lost connection')
+
+    monkeypatch.setattr(IdempotencyKey, 'complete', fail)
+    failed = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'crash'))
+    monkeypatch.undo()
+
+    assert failed.status_code == 500
+
+    assert Expense.query.count() == 0
+    assert IdempotencyKey.query.count() == 0
+
+    retry = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'crash'))
+    assert retry.status_code == 201
+    assert db.session.get(Account, user['account_id']).balance == 9000
+
+
+def test_keys_are_scoped_per_user(client, user):
+    """Two users may pick the same key independently."""
+    other = register_user(client, name='Other', email='other@example.com')
+    deposit(client, user, 100.0)
+    deposit(client, other, 100.0)
+
+    mine = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'shared'))
+    theirs = client.post('/api/expenses/', json=expense_payload(other), headers=with_key(other, 'shared'))
+
+    assert mine.status_code == theirs.status_code == 201
+    assert mine.get_json()['id'] != theirs.get_json()['id']
+
+
+def test_expired_keys_are_purged_and_reusable(client, user):
+    """Keys past their TTL run the request again and are purged."""
+    deposit(client, user, 100.0)
+    client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'old'))
+
+    IdempotencyKey.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+    again = client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'old'))
+    assert again.status_code == 201
+    assert 'Idempotent-Replayed' not in again.headers
+    assert Expense.query.count() == 2
+
+    IdempotencyKey.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    assert IdempotencyKey.purge_expired() == 1
+    assert IdempotencyKey.query.count() == 0
+
+
+def test_concurrent_duplicates_create_one_expense(threaded_app):
+    """Simultaneous retries with one key withdraw exactly once."""
+    client = threaded_app.test_client()
+    user = register_user(client)
+    deposit(client, user, 100.0)
+
+    def post():
+        return client.post('/api/expenses/', json=expense_payload(user), headers=with_key(user, 'burst'))
+
+    responses = run_parallel([post] * 16)
+    statuses = [response.status_code for response in responses]
+
+    assert set(statuses) <= {201, 409}
+    assert len({r.get_json()['id'] for r in responses if r.status_code == 201}) == 1
+
+    with threaded_app.app_context():
+        assert Expense.query.count() == 1
+        assert db.session.get(Account, user['account_id']).balance == 9000
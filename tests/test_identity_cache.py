@@ -0,0 +1,44 @@
+from app.identity import identity_cache_stats
+
+
+def test_authenticated_requests_skip_the_user_select(client, user, query_counter):
+    client.get('/api/accounts/', headers=user['headers'])
+    before = identity_cache_stats()
+
+    query_counter.clear()
+    response = client.get('/api/accounts/', headers=user['headers'])
+
+    assert response.status_code == 200
+    assert not [s for s in query_counter if 'FROM users' in s]
+    after = identity_cache_stats()
+    assert after['hits'] == before['hits'] + 1
+    assert after['misses'] == before['misses']
+
+
+def test_profile_updates_invalidate_the_cached_identity(client, user):
+    headers = user['headers']
+    assert client.get('/api/auth/me', headers=headers).get_json()['name'] == 'Test User'
+
+    client.put(f"/api/users/{user['user_id']}", json={'name': 'Renamed User'}, headers=headers)
+
+    assert client.get('/api/auth/me', headers=headers).get_json()['name'] == 'Renamed User'
+    assert client.get(f"/api/users/{user['user_id']}", headers=headers).get_json()['name'] == 'Renamed User'
+
+
+def test_deleted_users_lose_access_at_once(client, user):
+    headers = user['headers']
+    assert client.get('/api/accounts/', headers=headers).status_code == 200
+
+    assert client.delete(f"/api/users/{user['user_id']}", headers=headers).status_code == 204
+
+    assert client.get('/api/accounts/', headers=headers).status_code == 401
+
+
+def test_status_reports_identity_cache_counters(client, user):
+    client.get('/api/accounts/', headers=user['headers'])
+
+    stats = client.get('/status').get_json()['identity_cache']
+
+    assert stats['hits'] >= 1
+    assert stats['misses'] >= 1
+    assert stats['size'] >= 1
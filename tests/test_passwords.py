@@ -0,0 +1,58 @@
+from app import db
+from app.models.user import User
+from app.passwords import PasswordHasher
+from conftest import register_user
+
+
+def login(client, password='secret123'):
+    return client.post('/api/auth/login', json={'email': 'test@example.com', 'password': password})
+
+
+def test_login_rehashes_to_the_configured_cost(app, client, user):
+    assert db.session.get(User, user['user_id']).password_hash.startswith('$pbkdf2-sha256$1000$')
+
+    app.extensions['password_hasher'] = PasswordHasher(rounds=2000, workers=0)
+    assert login(client).status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(User, user['user_id']).password_hash.startswith('$pbkdf2-sha256$2000$')
+    assert login(client).status_code == 200
+    assert login(client, 'wrong-password').status_code == 401
+
+
+def test_full_hashing_queue_sheds_with_503(app, client, user):
+    hasher = PasswordHasher(rounds=1000, workers=1, queue_limit=1)
+    app.extensions['password_hasher'] = hasher
+    hasher._slots.acquire()
+
+    response = login(client)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_duplicate_registrations_do_not_use_the_hashing_queue(app, client, user):
+    hasher = PasswordHasher(rounds=1000, workers=1, queue_limit=1)
+    app.extensions['password_hasher'] = hasher
+    hasher._slots.acquire()
+
+    response = client.post('/api/auth/register', json={
+        'name': 'Someone Else',
+        'email': 'test@example.com',
+        'password': 'secret123',
+        'confirm_password': 'secret123'
+    })
+
+    assert response.status_code == 400
+
+
+def test_hashing_pool_round_trip(app, client):
+    hasher = PasswordHasher(rounds=1000, workers=1)
+    app.extensions['password_hasher'] = hasher
+    try:
+        user = register_user(client)
+        assert user['user_id']
+        assert login(client).status_code == 200
+        assert login(client, 'wrong-password').status_code == 401
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,133 @@
+import logging
+
+import pytest
+from app import db
+from app.models.balance_ledger import BalanceCheckpoint
+from app.models.expense import Expense
+from app.query_budget import QUERY_COUNT_HEADER, query_budget
+from conftest import post_expense
+
+
+@pytest.fixture
+def probe_routes(app):
+    """Routes with small budgets that misbehave on purpose."""
+    @app.route('/probe/over-budget')
+    @query_budget(1)
+    def over_budget():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.execute(db.text('SELECT 2'))
+        return {'ok': True}
+
+    @app.route('/probe/lazy-load')
+    @query_budget(10)
+    def lazy_load():
+        db.session.expire_all()
+        expense = Expense.query.first()
+        return {'account': expense.account.id}
+
+    return app
+
+
+def test_responses_report_their_query_count(client, user):
+    """Every response carries the number of SQL statements it issued."""
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    post_expense(client, user)
+
+    response = client.get('/api/expenses/', headers=user['headers'])
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) > 0
+
+
+def test_query_count_header_can_be_disabled(app, client, user):
+    """QUERY_COUNT_HEADER turns the header off."""
+    app.config['QUERY_COUNT_HEADER'] = False
+
+    response = client.get('/api/expenses/', headers=user['headers'])
+
+    assert QUERY_COUNT_HEADER not in response.headers
+
+
+def test_strict_mode_rejects_routes_over_budget(probe_routes, client):
+    """In strict mode a route over its budget fails."""
+    response = client.get('/probe/over-budget')
+
+    assert response.status_code == 500
+
+
+def test_strict_mode_rejects_lazy_loads(probe_routes, client, user):
+    """In strict mode a lazy relationship load in a budgeted route fails."""
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    post_expense(client, user)
+
+    response = client.get('/probe/lazy-load')
+
+    assert response.status_code == 500
+
+
+def test_non_strict_mode_only_warns(probe_routes, app, client, user, caplog):
+    """Outside strict mode overruns and lazy loads are only logged."""
+    app.config['QUERY_BUDGET_STRICT'] = False
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    post_expense(client, user)
+
+    with caplog.at_level(logging.WARNING):
+        over_budget = client.get('/probe/over-budget')
+        lazy_load = client.get('/probe/lazy-load')
+
+    assert over_budget.status_code == 200
+    assert lazy_load.status_code == 200
+    assert 'over its budget of 1' in caplog.text
+    assert 'Lazy load of' in caplog.text
+
+
+def test_batch_statements_do_not_grow_with_categories(client, user):
+    """A batch over many categories issues as many statements as one over a single category."""
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 1000.0}, headers=headers)
+    personal = [
+        client.post('/api/categories/', json={'name': name}, headers=headers).get_json()['id']
+        for name in ('Books', 'Games')
+    ]
+    item = {'user_id': user['user_id'], 'account_id': user['account_id'], 'amount': 5.0}
+
+    single = client.post('/api/expenses/batch', json={
+        'expenses': [{**item, 'category_id': user['category_ids']['Food']}] * 3
+    }, headers=headers)
+    mixed = client.post('/api/expenses/batch', json={
+        'expenses': [{**item, 'category_id': category_id}
+                     for category_id in [*user['category_ids'].values(), *personal]]
+    }, headers=headers)
+
+    assert single.status_code == mixed.status_code == 200
+    assert mixed.get_json()['created'] == 7
+    assert mixed.headers[QUERY_COUNT_HEADER] == single.headers[QUERY_COUNT_HEADER]
+    categories = {c['name']: c for c in client.get('/api/categories/', headers=headers).get_json()}
+    assert categories['Books']['expense_count'] == categories['Games']['expense_count'] == 1
+
+
+def test_money_writes_fit_their_budgets_in_the_worst_case(app, client, user, monkeypatch):
+    """Budgets hold with a cold identity cache and a ledger checkpoint on every entry."""
+    app.extensions['identity_cache'] = None
+    monkeypatch.setattr(BalanceCheckpoint, 'INTERVAL', 1)
+    headers = user['headers']
+    books, games = [
+        client.post('/api/categories/', json={'name': name}, headers=headers).get_json()['id']
+        for name in ('Books', 'Games')
+    ]
+    item = {'user_id': user['user_id'], 'account_id': user['account_id'], 'amount': 5.0, 'category_id': books}
+
+    income = client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 1000.0},
+                         headers={**headers, 'Idempotency-Key': 'income'})
+    created = client.post('/api/expenses/', json=item, headers={**headers, 'Idempotency-Key': 'expense'})
+    batch = client.post('/api/expenses/batch', json={
+        'expenses': [{**item, 'category_id': category_id}
+                     for category_id in [*user['category_ids'].values(), books, games]]
+    }, headers=headers)
+    url = f"/api/expenses/{created.get_json()['id']}"
+    updated = client.put(url, json={'amount': 7.0, 'category_id': games}, headers=headers)
+    deleted = client.delete(url, headers=headers)
+
+    assert [income.status_code, created.status_code, batch.status_code] == [201, 201, 200]
+    assert [updated.status_code, deleted.status_code] == [200, 204]
+    assert BalanceCheckpoint.query.count() == 5
@@ -0,0 +1,151 @@
+"""Query-plan regression tests for the expense, income and user access paths.
+
+Every statement the routes issue against the large tables is captured,
+re-run through EXPLAIN and rejected if the planner falls back to a full
+table scan. Runs on SQLite by default and on PostgreSQL when
+TEST_DATABASE_URL points at one.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from app import db
+from app.models.account import Account
+from app.models.expense import Expense
+from app.models.income import Income
+from app.models.user import User
+from conftest import register_user
+
+INDEXED_TABLES = ('expenses', 'incomes', 'accounts', 'balance_entries', 'balance_checkpoints', 'users')
+OTHER_USERS = 50
+ROWS_PER_USER = 200
+
+
+def seed_background_data(category_id):
+    """Fill the tables with other users' rows so plans reflect real volumes."""
+    start = datetime(2023, 1, 1)
+    users, accounts, expenses, incomes = [], [], [], []
+    for u in range(OTHER_USERS):
+        user_id, account_id = str(uuid.uuid4()), str(uuid.uuid4())
+        users.append({'id': user_id, 'name': f'user{u}', 'email': f'user{u}@example.com',
+                      'password_hash': 'x', 'created_at': start})
+        accounts.append({'id': account_id, 'user_id': user_id, 'balance': 0,
+                         'created_at': start, 'updated_at': start})
+        for i in range(ROWS_PER_USER):
+            created_at = start + timedelta(hours=i)
+            expenses.append({'id': str(uuid.uuid4()), 'user_id': user_id,
+                             'category_id': category_id, 'account_id': account_id,
+                             'amount': 100, 'created_at': created_at})
+            incomes.append({'id': str(uuid.uuid4()), 'account_id': account_id,
+                            'amount': 100, 'created_at': created_at})
+
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(Account.__table__.insert(), accounts)
+    db.session.execute(Expense.__table__.insert(), expenses)
+    db.session.execute(Income.__table__.insert(), incomes)
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+def full_scans(connection, statement, parameters):
+    """Return the plan lines that scan one of the indexed tables in full."""
+    if connection.dialect.name == 'sqlite':
+        plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        details = [row[-1] for row in plan]
+        return [
+            detail for detail in details
+            if any(detail == f'SCAN {table}' for table in INDEXED_TABLES)
+        ]
+
+    plan = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).all()
+    details = [row[0] for row in plan]
+    return [
+        detail for detail in details
+        if any(f'Seq Scan on {table}' in detail for table in INDEXED_TABLES)
+    ]
+
+
+@pytest.fixture
+def captured_selects(app):
+    """Capture SELECT statements with their parameters."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def seeded_user(client):
+    user = register_user(client)
+    seed_background_data(user['category_ids']['Food'])
+
+    for i in range(3):
+        client.post(f"/api/accounts/{user['account_id']}/income",
+                    json={'amount': 100.0}, headers=user['headers'])
+        client.post('/api/expenses/', json={
+            'user_id': user['user_id'],
+            'category_id': user['category_ids']['Food'],
+            'account_id': user['account_id'],
+            'amount': 10.0
+        }, headers=user['headers'])
+    return user
+
+
+def route_urls(user):
+    account_id = user['account_id']
+    category_id = user['category_ids']['Food']
+    return [
+        '/api/expenses/',
+        '/api/expenses/?limit=2',
+        f'/api/expenses/?account_id={account_id}',
+        f'/api/expenses/?category_id={category_id}',
+        '/api/expenses/?start_date=2024-01-01T00:00:00&end_date=2030-01-01T00:00:00',
+        '/api/expenses/summary',
+        '/api/accounts/',
+        f'/api/accounts/{account_id}/income',
+        f'/api/accounts/{account_id}/balance',
+        f'/api/accounts/{account_id}/balance?at=2030-01-01T00:00:00',
+        f'/api/accounts/{account_id}/statement?limit=2',
+        '/api/users/?limit=2',
+        '/api/users/?prefix=user1',
+        '/api/users/?name=ser4',
+        '/api/users/?email=USER7@example.com',
+        f"/api/users/{user['user_id']}/stats",
+    ]
+
+
+def test_read_routes_avoid_full_scans(client, seeded_user, captured_selects):
+    """No read route regresses to a full scan of one of the indexed tables."""
+    for url in route_urls(seeded_user):
+        captured_selects.clear()
+        response = client.get(url, headers=seeded_user['headers'])
+        assert response.status_code == 200, url
+
+        with db.engine.connect() as connection:
+            for statement, parameters in captured_selects:
+                scans = full_scans(connection, statement, parameters)
+                assert not scans, f'{url} scans {scans}:\n{statement}'
+
+
+def test_cursor_pages_avoid_full_scans(client, seeded_user, captured_selects):
+    """Following a cursor keeps using the (created_at, id) indexes."""
+    account_id = seeded_user['account_id']
+    for url in ('/api/expenses/?limit=1', f'/api/accounts/{account_id}/statement?limit=1', '/api/users/?limit=1'):
+        first = client.get(url, headers=seeded_user['headers'])
+        link = first.headers['Link']
+
+        captured_selects.clear()
+        client.get(link[1:link.index('>')], headers=seeded_user['headers'])
+
+        with db.engine.connect() as connection:
+            for statement, parameters in captured_selects:
+                assert not full_scans(connection, statement, parameters), statement
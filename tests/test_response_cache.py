@@ -0,0 +1,132 @@
+import time
+
+from app.cache import LocalCache
+from conftest import post_expense, register_user
+
+EXPENSE_TABLES = ('expenses', 'expense_rollups', 'accounts')
+
+
+def touches(statements, tables):
+    return [s for s in statements if any(f'FROM {table}' in s or f'JOIN {table}' in s for table in tables)]
+
+
+def test_if_none_match_returns_304_without_data_queries(client, user, query_counter):
+    """A matching ETag is answered from the user's data version alone."""
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    post_expense(client, user)
+
+    for url in ('/api/expenses/', '/api/expenses/summary', f"/api/accounts/{user['account_id']}/balance"):
+        first = client.get(url, headers=user['headers'])
+        assert first.status_code == 200
+        assert first.headers['ETag']
+
+        query_counter.clear()
+        second = client.get(url, headers={**user['headers'], 'If-None-Match': first.headers['ETag']})
+
+        assert second.status_code == 304, url
+        assert second.headers['ETag'] == first.headers['ETag']
+        assert not touches(query_counter, EXPENSE_TABLES), url
+
+
+def test_repeat_reads_are_served_from_cache(client, user, query_counter):
+    """Without If-None-Match the cached body is returned unchanged."""
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    post_expense(client, user)
+    first = client.get('/api/expenses/summary', headers=user['headers'])
+
+    query_counter.clear()
+    second = client.get('/api/expenses/summary', headers=user['headers'])
+
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert not touches(query_counter, EXPENSE_TABLES)
+
+
+def test_writes_change_the_etag(client, user):
+    """Expense, income and category writes all invalidate cached reads."""
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    balance_url = f"/api/accounts/{user['account_id']}/balance"
+
+    before = client.get(balance_url, headers=user['headers'])
+    summary_before = client.get('/api/expenses/summary', headers=user['headers'])
+    expense_id = post_expense(client, user, amount=25.0).get_json()['id']
+
+    after = client.get(balance_url, headers={**user['headers'], 'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.get_json()['balance'] == 75.0
+
+    summary = client.get('/api/expenses/summary', headers=user['headers'])
+    assert summary.headers['ETag'] != summary_before.headers['ETag']
+    assert summary.get_json()['total_expenses'] == 25.0
+
+    client.put(f'/api/expenses/{expense_id}', json={'amount': 5.0}, headers=user['headers'])
+    assert client.get('/api/expenses/summary', headers=user['headers']).get_json()['total_expenses'] == 5.0
+
+    listing = client.get('/api/expenses/', headers=user['headers'])
+    client.post('/api/categories/', json={'name': 'Books'}, headers=user['headers'])
+    relisted = client.get('/api/expenses/', headers={**user['headers'], 'If-None-Match': listing.headers['ETag']})
+    assert relisted.status_code == 200
+
+
+def test_cached_responses_are_per_user(client, user):
+    """Another user's ETag and cache entries never match."""
+    other = register_user(client, name='Other', email='other@example.com')
+    mine = client.get('/api/expenses/', headers=user['headers'])
+
+    theirs = client.get('/api/expenses/', headers={**other['headers'], 'If-None-Match': mine.headers['ETag']})
+
+    assert theirs.status_code == 200
+    assert theirs.headers['ETag'] != mine.headers['ETag']
+    assert 'Authorization' in theirs.headers['Vary']
+
+
+def test_local_cache_evicts_oldest_and_expired():
+    """The in-process fallback is a bounded LRU with expiry."""
+    cache = LocalCache(size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+    expiring = LocalCache(size=2, ttl=0)
+    expiring.set('a', 1)
+    time.sleep(0.001)
+    assert expiring.get('a') is None
+
+
+def test_large_bodies_get_an_etag_but_are_not_cached(app, client, user, query_counter):
+    """Bodies over the entry limit are rebuilt on every read but still revalidate."""
+    app.config['RESPONSE_CACHE_MAX_ENTRY_BYTES'] = 10
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=user['headers'])
+    post_expense(client, user)
+    first = client.get('/api/expenses/', headers=user['headers'])
+
+    query_counter.clear()
+    second = client.get('/api/expenses/', headers=user['headers'])
+    assert second.data == first.data
+    assert touches(query_counter, EXPENSE_TABLES)
+
+    third = client.get('/api/expenses/', headers={**user['headers'], 'If-None-Match': first.headers['ETag']})
+    assert third.status_code == 304
+    assert app.extensions['response_cache'].stats()['size'] == 0
+
+
+def test_local_cache_bounds_total_bytes():
+    """With max_bytes, old entries are evicted to stay under the byte budget."""
+    cache = LocalCache(size=10, ttl=60, max_bytes=10)
+    cache.set('a', 'x' * 4)
+    cache.set('b', 'x' * 4)
+    cache.set('c', 'x' * 4)
+
+    assert cache.get('a') is None
+    assert cache.get('b') and cache.get('c')
+    assert cache.stats()['bytes'] == 8
+
+    cache.set('big', 'x' * 11)
+    assert cache.get('big') is None
+    cache.delete('b')
+    assert cache.stats()['bytes'] == 4
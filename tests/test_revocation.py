@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.revoked_token import RevokedToken
+from app.revocation import RevocationList, revocation_list
+from conftest import register_user
+
+
+def _login(client, email='test@example.com', password='secret123'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password}).get_json()
+
+
+def test_logout_revokes_the_token(client, user):
+    headers = user['headers']
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+
+    response = client.get('/api/accounts/', headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'token_revoked'
+
+
+def test_logout_leaves_other_sessions_valid(client, user):
+    other = {'Authorization': f"Bearer {_login(client)['access_token']}"}
+
+    client.post('/api/auth/logout', headers=user['headers'])
+
+    assert client.get('/api/accounts/', headers=other).status_code == 200
+
+
+def test_refresh_tokens_can_be_revoked(client, user):
+    refresh = {'Authorization': f"Bearer {_login(client)['refresh_token']}"}
+    assert client.post('/api/auth/refresh', headers=refresh).status_code == 200
+
+    assert client.post('/api/auth/logout', headers=refresh).status_code == 200
+
+    assert client.post('/api/auth/refresh', headers=refresh).status_code == 401
+
+
+def test_revocation_check_skips_the_database(client, user, query_counter):
+    client.get('/api/accounts/', headers=user['headers'])
+
+    query_counter.clear()
+    client.get('/api/accounts/', headers=user['headers'])
+
+    assert not [s for s in query_counter if 'revoked_tokens' in s]
+
+
+def test_other_workers_pick_up_revocations_on_sync(client, app):
+    user = register_user(client)
+    other_worker = RevocationList()
+    other_worker.sync()
+
+    client.post('/api/auth/logout', headers=user['headers'])
+    jti = RevokedToken.query.one().jti
+    assert not other_worker.is_revoked(jti)
+
+    other_worker.sync()
+
+    assert other_worker.is_revoked(jti)
+
+
+def test_expired_revocations_are_dropped(app):
+    now = datetime.utcnow()
+    db.session.add_all([
+        RevokedToken(jti='expired', token_type='access', revoked_at=now - timedelta(hours=2),
+                     expires_at=now - timedelta(hours=1)),
+        RevokedToken(jti='live', token_type='access', revoked_at=now, expires_at=now + timedelta(hours=1)),
+    ])
+    db.session.commit()
+
+    revocations = revocation_list()
+    revocations.add('stale', now - timedelta(seconds=1))
+    revocations.sync()
+
+    assert revocations.is_revoked('live')
+    assert not revocations.is_revoked('expired')
+    assert len(revocations) == 1
+
+    result = app.test_cli_runner().invoke(args=['tokens', 'purge'])
+    assert 'Removed 1 expired revoked tokens' in result.output
+    assert [token.jti for token in RevokedToken.query.all()] == ['live']
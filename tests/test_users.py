@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.user import User
+
+
+def add_users(names, start=datetime(2024, 1, 1)):
+    """Insert users directly, one minute apart in the given order."""
+    db.session.execute(User.__table__.insert(), [
+        {
+            'id': f'user-{i:04d}',
+            'name': name,
+            'email': f"{name.replace(' ', '.').replace('%', 'pct')}@Example.com",
+            'password_hash': 'x',
+            'created_at': start + timedelta(minutes=i)
+        }
+        for i, name in enumerate(names)
+    ])
+    db.session.commit()
+
+
+def names(response):
+    return [user['name'] for user in response.get_json()]
+
+
+def test_user_directory_pages_newest_first(client, user):
+    add_users([f'Member {i}' for i in range(5)])
+
+    first = client.get('/api/users/?limit=3', headers=user['headers'])
+    assert names(first) == ['Test User', 'Member 4', 'Member 3']
+    assert first.get_json()[0].keys() == {'id', 'name', 'email'}
+
+    link = first.headers['Link']
+    second = client.get(link[1:link.index('>')], headers=user['headers'])
+    assert names(second) == ['Member 2', 'Member 1', 'Member 0']
+    assert 'Link' not in second.headers
+
+
+def test_user_directory_search(client, user):
+    add_users(['Alice Cooper', 'alicia keys', 'Bob Alison', 'Mallory', '100% Carol', '100x Carol'])
+    headers = user['headers']
+
+    assert names(client.get('/api/users/?prefix=ALI', headers=headers)) == ['alicia keys', 'Alice Cooper']
+    assert names(client.get('/api/users/?name=alI', headers=headers)) == ['Bob Alison', 'alicia keys', 'Alice Cooper']
+    assert names(client.get('/api/users/?name=lor', headers=headers)) == ['Mallory']
+    assert names(client.get('/api/users/?name=0%25 C', headers=headers)) == ['100% Carol']
+    assert names(client.get('/api/users/?prefix=100%25', headers=headers)) == ['100% Carol']
+    assert names(client.get('/api/users/?email=ALICE.COOPER@example.COM', headers=headers)) == ['Alice Cooper']
+
+
+def test_user_directory_search_folds_non_ascii_case(client, user):
+    add_users(['Émile Zola', 'élodie', 'Ömer', 'Ярослав Бондар'])
+    headers = user['headers']
+
+    assert names(client.get('/api/users/?prefix=ÉL', headers=headers)) == ['élodie']
+    assert names(client.get('/api/users/?prefix=é', headers=headers)) == ['élodie', 'Émile Zola']
+    assert names(client.get('/api/users/?prefix=яРО', headers=headers)) == ['Ярослав Бондар']
+    assert names(client.get('/api/users/?name=%25mer', headers=headers)) == []
+    assert names(client.get('/api/users/?name=ömer', headers=headers)) == ['Ömer']
+    assert names(client.get('/api/users/?name=ÉMILE', headers=headers)) == ['Émile Zola']
+    assert names(client.get('/api/users/?name=ярослав', headers=headers)) == ['Ярослав Бондар']
+    assert names(client.get('/api/users/?name=БОНД', headers=headers)) == ['Ярослав Бондар']
+    assert names(client.get('/api/users/?name=Дар%25', headers=headers)) == []
+
+
+def test_user_directory_prefix_at_the_last_code_point(client, user):
+    add_users(['\U0010ffff\U0010ffffz', 'zz'])
+    headers = user['headers']
+
+    response = client.get('/api/users/?prefix=%F4%8F%BF%BF', headers=headers)
+    assert response.status_code == 200
+    assert names(response) == ['\U0010ffff\U0010ffffz']
+    assert names(client.get('/api/users/?prefix=\ud7ff', headers=headers)) == []
+
+
+def test_user_directory_search_follows_renames(client, user):
+    add_users(['Old Name'])
+    db.session.get(User, 'user-0000').name = 'Fresh Name'
+    db.session.commit()
+
+    assert names(client.get('/api/users/?name=old', headers=user['headers'])) == []
+    assert names(client.get('/api/users/?name=fresh', headers=user['headers'])) == ['Fresh Name']
+
+
+def test_user_directory_invalid_cursor(client, user):
+    response = client.get('/api/users/?cursor=not-a-cursor', headers=user['headers'])
+    assert response.status_code == 400
+
+
+def test_user_stats_aggregate_and_follow_writes(client, user, query_counter):
+    headers = user['headers']
+    url = f"/api/users/{user['user_id']}/stats"
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=headers)
+    client.post('/api/categories/', json={'name': 'Books'}, headers=headers)
+    client.post('/api/expenses/batch', json={'expenses': [{
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': 12.5
+    }] * 2}, headers=headers)
+
+    query_counter.clear()
+    stats = client.get(url, headers=headers).get_json()
+    assert stats == {
+        'user_id': user['user_id'],
+        'total_expenses': 25.0,
+        'account_balance': 75.0,
+        'user_categories_count': 1,
+        'total_expenses_count': 2
+    }
+    assert len([s for s in query_counter if 'expense_rollups' in s]) == 1
+    assert not [s for s in query_counter if 'FROM expenses' in s]
+
+    # Repeat reads are a cache hit until the next write
+    query_counter.clear()
+    assert client.get(url, headers=headers).get_json() == stats
+    assert not [s for s in query_counter if 'expense_rollups' in s]
+
+    client.post('/api/expenses/', json={
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': 5.0
+    }, headers=headers)
+    stats = client.get(url, headers=headers).get_json()
+    assert stats['total_expenses'] == 30.0
+    assert stats['account_balance'] == 70.0
+    assert stats['total_expenses_count'] == 3
+
+
+def test_user_stats_only_for_self(client, user):
+    response = client.get('/api/users/someone-else/stats', headers=user['headers'])
+    assert response.status_code == 403
+
+
+def test_user_stats_are_json_numbers_for_decimal_sums(client, user, decimal_sums):
+    headers = user['headers']
+    client.post(f"/api/accounts/{user['account_id']}/income", json={'amount': 100.0}, headers=headers)
+    client.post('/api/expenses/', json={
+        'user_id': user['user_id'],
+        'category_id': user['category_ids']['Food'],
+        'account_id': user['account_id'],
+        'amount': 12.34
+    }, headers=headers)
+
+    stats = client.get(f"/api/users/{user['user_id']}/stats", headers=headers).get_json()
+
+    assert stats['total_expenses'] == 12.34 and isinstance(stats['total_expenses'], float)
+    assert stats['account_balance'] == 87.66 and isinstance(stats['account_balance'], float)
+    assert stats['total_expenses_count'] == 1